@@ -1,20 +1,64 @@
+import os
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output, State
-import joblib
-import pandas as pd
-
-# Load the trained model
-model = joblib.load('linear_regression_model_with_clusters.pkl')
+from dash.dependencies import Input, Output, State, ClientsideFunction, ALL, MATCH
+import clientside_model
+import cluster_index
+import feature_registry
+import instrumentation
+import prediction_service
+
+# Load the trained model and start the batching prediction service
+predictor = prediction_service.load_predictor()
+batcher = prediction_service.MicroBatcher(predictor)
+predict_cached = clientside_model.cached_predictor(batcher)  # LRU cache of recent server-side predictions
+
+# Cluster ranges learned by the clustering script; features without clusters use the registry thresholds
+clusters = cluster_index.load_index()
+
+# Per-station models from the model registry, loaded on first selection and kept in an LRU cache
+station_models = prediction_service.StationModels(default=(predictor, clusters))
+STATION_OPTIONS = [{'label': 'Default model', 'value': prediction_service.DEFAULT_STATION}] + [
+    {'label': f'Station {station:05d}', 'value': station} for station in station_models.stations()
+]
+
+# Function to describe a model for the clientside predictions (None for models the browser cannot compute)
+def station_payload(model):
+    if list(model.features) != list(predictor.features):  # The clientside inputs follow the default model's feature order
+        return None
+    return clientside_model.model_payload(model, categorical={'Month': clientside_model.MONTH_NUMBERS})
+
+default_payload = station_payload(predictor)
+
+# Input component of each model feature
+FEATURE_INPUTS = {feature['name']: 'month-dropdown' if feature['key'] == 'month' else feature_registry.slider_id(feature['key'])
+                  for feature in feature_registry.FEATURES}
+
+# Function to build the card with the icon, cluster selector and slider of a climate feature
+def feature_card(feature):
+    low, high, step, default = feature_registry.slider(feature['key'], clusters)  # Spans the learned clusters
+    return html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
+        html.Img(src=f"/assets/{feature['icon']}", style={'width': '50px'}),
+        html.Label(feature['name'], style={'color': '#FFFFFF'}),
+        dcc.RadioItems(id=feature_registry.cluster_id(feature['key']), options=[
+            {'label': level.capitalize(), 'value': level} for level in feature_registry.CLUSTER_LEVELS
+        ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
+        dcc.Slider(id=feature_registry.slider_id(feature['key']), min=low, max=high, step=step, value=default,
+                   marks=feature_registry.slider_marks(feature['key'], low, high), tooltip={"placement": "bottom"})
+    ])
 
 # Initialize the Dash app
 app = dash.Dash(__name__)
+server = app.server  # WSGI entry point for production servers (see wsgi.py)
+instrumentation.register_metrics_endpoint(server)  # Prometheus metrics of the callbacks at /metrics
 
 # Define custom styles
 app.layout = html.Div(style={'backgroundColor': '#000000', 'color': '#FFFFFF', 'textAlign': 'center', 'fontFamily': 'Arial, sans-serif'}, children=[
     html.H1('Average Daily Temperature Prediction', style={'color': '#39FF14', 'paddingTop': '20px'}),
 
     html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '60%', 'margin': '0 auto', 'marginBottom': '20px'}, children=[
+        html.Label('Select Station:', style={'color': '#FFFFFF'}),
+        dcc.Dropdown(id='station-dropdown', options=STATION_OPTIONS, value=prediction_service.DEFAULT_STATION, clearable=False, style={'width': '50%'}),
         html.Label('Select Month:', style={'color': '#FFFFFF'}),
         dcc.Dropdown(
             id='month-dropdown',
@@ -38,189 +82,86 @@ app.layout = html.Div(style={'backgroundColor': '#000000', 'color': '#FFFFFF', '
     ]),
 
     html.Div(style={'display': 'flex', 'justifyContent': 'space-around', 'flexWrap': 'wrap', 'padding': '20px'}, children=[
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/wind.png', style={'width': '50px'}),
-            html.Label('Wind Speed (m/s)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='wind_speed_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='wind_speed', min=0, max=50, step=0.1, value=2.0, marks={i: str(i) for i in range(0, 51, 5)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/precipitation.png', style={'width': '50px'}),
-            html.Label('Precipitation Level (mm)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='precipitation_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='precipitation', min=0, max=200, step=0.1, value=0.0, marks={i: str(i) for i in range(0, 201, 20)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/sun.png', style={'width': '50px'}),
-            html.Label('Sun Duration (hours)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='sun_duration_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='sun_duration', min=0, max=18, step=0.1, value=8.0, marks={i: str(i) for i in range(0, 19, 2)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/snow.png', style={'width': '50px'}),
-            html.Label('Snow Height (cm)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='snow_height_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='snow_height', min=0, max=100, step=0.1, value=0.0, marks={i: str(i) for i in range(0, 101, 10)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/cloud.png', style={'width': '50px'}),
-            html.Label('Cloud Cover (octaves)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='cloud_cover_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='cloud_cover', min=0, max=8, step=1, value=4, marks={i: str(i) for i in range(0, 9, 1)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/vapor.png', style={'width': '50px'}),
-            html.Label('Vapor Pressure (hPa)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='vapor_pressure_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='vapor_pressure', min=0, max=30, step=0.1, value=10.0, marks={i: str(i) for i in range(0, 31, 5)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/pressure.png', style={'width': '50px'}),
-            html.Label('Atmospheric Pressure (hPa)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='atmospheric_pressure_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='atmospheric_pressure', min=1000, max=1060, step=0.1, value=1013.25, marks={i: str(i) for i in range(1000, 1061, 10)}, tooltip={"placement": "bottom"})
-        ]),
-
-        html.Div(style={'backgroundColor': '#1c1c1c', 'padding': '20px', 'borderRadius': '10px', 'width': '45%', 'marginBottom': '20px'}, children=[
-            html.Img(src='/assets/humidity.png', style={'width': '50px'}),
-            html.Label('Relative Humidity (%)', style={'color': '#FFFFFF'}),
-            dcc.RadioItems(id='humidity_cluster', options=[
-                {'label': 'Low', 'value': 'low'},
-                {'label': 'Medium', 'value': 'medium'},
-                {'label': 'High', 'value': 'high'}
-            ], value='low', labelStyle={'display': 'inline-block', 'color': '#39FF14'}),
-            dcc.Slider(id='humidity', min=0, max=100, step=0.1, value=50.0, marks={i: str(i) for i in range(0, 101, 10)}, tooltip={"placement": "bottom"})
-        ])
+        feature_card(feature) for feature in feature_registry.CLIMATE_FEATURES
     ]),
 
-    html.Button('Adjust Cluster Parameters', id='adjust_cluster_button', n_clicks=0, style={'backgroundColor': '#39FF14', 'color': '#000000', 'padding': '10px 20px', 'fontSize': '16px', 'marginTop': '20px'}),
-
     html.Button('Predict Temperature', id='predict-button', n_clicks=0, style={'backgroundColor': '#39FF14', 'color': '#000000', 'padding': '10px 20px', 'fontSize': '16px', 'marginTop': '20px'}),
 
-    html.H2(id='prediction-output', style={'color': '#FFFFFF', 'paddingTop': '20px'})
+    html.H2(id='prediction-output', style={'color': '#FFFFFF', 'paddingTop': '20px'}),
+
+    dcc.Store(id='clientside-model', data=default_payload)
 ])
 
-# Define the callback to adjust the cluster parameters
+# Define the callback to set a feature's cluster from its slider value; only that selector is updated
 @app.callback(
-    Output('wind_speed_cluster', 'value'),
-    Output('precipitation_cluster', 'value'),
-    Output('sun_duration_cluster', 'value'),
-    Output('snow_height_cluster', 'value'),
-    Output('cloud_cover_cluster', 'value'),
-    Output('vapor_pressure_cluster', 'value'),
-    Output('atmospheric_pressure_cluster', 'value'),
-    Output('humidity_cluster', 'value'),
-    Input('adjust_cluster_button', 'n_clicks'),
-    State('wind_speed', 'value'),
-    State('precipitation', 'value'),
-    State('sun_duration', 'value'),
-    State('snow_height', 'value'),
-    State('cloud_cover', 'value'),
-    State('vapor_pressure', 'value'),
-    State('atmospheric_pressure', 'value'),
-    State('humidity', 'value')
+    Output(feature_registry.cluster_id(MATCH), 'value'),
+    Input(feature_registry.slider_id(MATCH), 'value'),
+    State(feature_registry.slider_id(MATCH), 'id'),
+    State('station-dropdown', 'value')
 )
-def adjust_cluster_parameters(n_clicks, wind_speed, precipitation, sun_duration, snow_height, cloud_cover, vapor_pressure, atmospheric_pressure, humidity):
-    # Logic to adjust the cluster parameters based on input values
-    wind_speed_cluster = 'low' if wind_speed < 10 else 'medium' if wind_speed < 20 else 'high'
-    precipitation_cluster = 'low' if precipitation < 50 else 'medium' if precipitation < 100 else 'high'
-    sun_duration_cluster = 'low' if sun_duration < 6 else 'medium' if sun_duration < 12 else 'high'
-    snow_height_cluster = 'low' if snow_height < 20 else 'medium' if snow_height < 50 else 'high'
-    cloud_cover_cluster = 'low' if cloud_cover < 3 else 'medium' if cloud_cover < 6 else 'high'
-    vapor_pressure_cluster = 'low' if vapor_pressure < 10 else 'medium' if vapor_pressure < 20 else 'high'
-    atmospheric_pressure_cluster = 'low' if atmospheric_pressure < 1010 else 'medium' if atmospheric_pressure < 1030 else 'high'
-    humidity_cluster = 'low' if humidity < 30 else 'medium' if humidity < 70 else 'high'
-    
-    return (
-        wind_speed_cluster, precipitation_cluster, sun_duration_cluster, snow_height_cluster, cloud_cover_cluster, 
-        vapor_pressure_cluster, atmospheric_pressure_cluster, humidity_cluster
-    )
-
-# Define the callback to predict the temperature
+@instrumentation.timed('cluster_app.adjust_cluster_parameters')
+def adjust_cluster_parameters(value, component_id, station):
+    # Look up the cluster whose centroid is nearest to the value, among the selected station's clusters
+    _, station_clusters = station_models.get(station)
+    return feature_registry.classify(component_id['feature'], value, station_clusters)
+
+# Swap in the clientside model of the selected station and span the sliders over its clusters
 @app.callback(
+    Output('clientside-model', 'data'),
+    Output(feature_registry.slider_id(ALL), 'min'),
+    Output(feature_registry.slider_id(ALL), 'max'),
+    Output(feature_registry.slider_id(ALL), 'marks'),
+    Output(feature_registry.slider_id(ALL), 'value'),
+    Input('station-dropdown', 'value'),
+    State(feature_registry.slider_id(ALL), 'id'),
+    State(feature_registry.slider_id(ALL), 'value'),
+    prevent_initial_call=True
+)
+@instrumentation.timed('cluster_app.select_station')
+def select_station(station, slider_ids, values):
+    model, station_clusters = station_models.get(station)
+    bounds = [feature_registry.slider(component_id['feature'], station_clusters)[:2] for component_id in slider_ids]
+    return (station_payload(model),
+            [low for low, _ in bounds],
+            [high for _, high in bounds],
+            [feature_registry.slider_marks(component_id['feature'], low, high) for component_id, (low, high) in zip(slider_ids, bounds)],
+            [min(max(value, low), high) for value, (low, high) in zip(values, bounds)])  # Keep each value, moved into the new bounds
+
+# Update the prediction live in the browser from the model coefficients, without a server call
+app.clientside_callback(
+    ClientsideFunction(namespace='clientside', function_name='predict_daily'),
     Output('prediction-output', 'children'),
+    [Input(FEATURE_INPUTS[feature], 'value') for feature in predictor.features],
+    State('clientside-model', 'data')
+)
+
+# Define the callback to predict the temperature on the server (fallback, results are cached)
+@app.callback(
+    Output('prediction-output', 'children', allow_duplicate=True),
     Input('predict-button', 'n_clicks'),
-    State('month-dropdown', 'value'),
-    State('wind_speed', 'value'),
-    State('precipitation', 'value'),
-    State('sun_duration', 'value'),
-    State('snow_height', 'value'),
-    State('cloud_cover', 'value'),
-    State('vapor_pressure', 'value'),
-    State('atmospheric_pressure', 'value'),
-    State('humidity', 'value'),
-    State('wind_speed_cluster', 'value'),
-    State('precipitation_cluster', 'value'),
-    State('sun_duration_cluster', 'value'),
-    State('snow_height_cluster', 'value'),
-    State('cloud_cover_cluster', 'value'),
-    State('vapor_pressure_cluster', 'value'),
-    State('atmospheric_pressure_cluster', 'value'),
-    State('humidity_cluster', 'value')
+    [State('station-dropdown', 'value')] + [State(FEATURE_INPUTS[feature], 'value') for feature in predictor.features],
+    prevent_initial_call=True
 )
-def predict_temperature(n_clicks, month, wind_speed, precipitation, sun_duration, snow_height, cloud_cover, vapor_pressure, atmospheric_pressure, humidity,
-                        wind_speed_cluster, precipitation_cluster, sun_duration_cluster, snow_height_cluster, cloud_cover_cluster,
-                        vapor_pressure_cluster, atmospheric_pressure_cluster, humidity_cluster):
+@instrumentation.timed('cluster_app.predict_temperature')
+def predict_temperature(n_clicks, station, *values):
     if n_clicks > 0:
+        row = dict(zip(predictor.features, values))
+
         # Map the month name to the month number
-        month_mapping = {
-            'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
-            'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
-        }
-        month_number = month_mapping.get(month, 1)  # Default to January if month is not found
-
-        # Create a DataFrame with the input values
-        input_data = pd.DataFrame({
-            'Month': [month_number],
-            'Wind Speed (m/s)': [wind_speed],
-            'Precipitation Level (mm)': [precipitation],
-            'Sun Duration (hours)': [sun_duration],
-            'Snow Height (cm)': [snow_height],
-            'Cloud Cover (octaves)': [cloud_cover],
-            'Vapor Pressure (hPa)': [vapor_pressure],
-            'Atmospheric Pressure (hPa)': [atmospheric_pressure],
-            'Relative Humidity (%)': [humidity]
-        })
-
-        # Use the model to make a prediction
-        prediction = model.predict(input_data)[0]
+        row['Month'] = clientside_model.MONTH_NUMBERS.get(row['Month'], 1)  # Default to January if month is not found
+
+        # Build the feature row in the order the selected model expects
+        model, _ = station_models.get(station)
+        input_data = model.row(row)
+
+        if model is predictor:
+            # Use the cached prediction service, which batches clicks arriving together
+            prediction = predict_cached(tuple(input_data))
+        else:
+            prediction = float(model.predict(input_data)[0])  # Station models are a single dot product
 
         return f'The predicted average daily temperature is {prediction:.2f} °C'
     return ''
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
\ No newline at end of file
+    app.run(debug=os.environ.get('DASH_DEBUG', '1') == '1')  # Development server; set DASH_DEBUG=0 to turn off the debugger and reloader
\ No newline at end of file
@@ -1,35 +1,52 @@
+import argparse
+import os
 import joblib
 import pandas as pd
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 import matplotlib.pyplot as plt
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+import cluster_index
+import data_cache
+import feature_registry
+import instrumentation
+import model_artifact
+import plot_rendering
+import quality
+import schema
+import stage_cache
 
-# Function to load and clean the data
+# Function to load the cleaned data, reusing the columnar cache when the CSV is unchanged
+@instrumentation.timed('regression.load_data')
 def load_data(file_path):
-    df = pd.read_csv(file_path, delimiter=',')  # Load the dataset from a CSV file
+    return data_cache.cached_load(file_path, parse_data)  # Parses the CSV only when the cache is cold or stale
+
+# Function to parse and clean the clustered data
+def parse_data(file_path):
+    df = pd.read_csv(file_path, delimiter=',', usecols=schema.keep_column)  # Load the dataset, without eor and per-row cluster ranges
     df.columns = df.columns.str.strip()  # Remove any leading or trailing spaces from the column names
-    df.replace(-999, pd.NA, inplace=True)  # Replace placeholder values (-999) with NaN (missing value indicator)
-    df.dropna(inplace=True)  # Drop rows with missing values to clean the data
+    df = quality.mask_missing(df)  # Replace placeholder values (-999) with NaN, keeping numeric dtypes
+    df = df.dropna(subset=feature_registry.MEASUREMENT_FEATURES + [feature_registry.TARGET])  # Drop rows missing a model input, not any column
 
     # Ensure the 'Date' column is in datetime format
     df['Date'] = pd.to_datetime(df['Date'])  # Convert the 'Date' column to datetime format
     df['Month'] = df['Date'].dt.month  # Extract the month from the date and create a new column 'Month'
 
-    # Encoding cluster information as numerical values
-    cluster_mapping = {'Low': 1, 'Medium': 2, 'High': 3}  # Define a mapping for categorical cluster labels to numerical values
-    df['Cluster'] = df['Cluster Label'].map(cluster_mapping)  # Map the cluster labels to numerical values
-    df['Cluster_Sun'] = df['Cluster Label_Sun'].map(cluster_mapping)
-    df['Cluster_Precip'] = df['Cluster Label_Precip'].map(cluster_mapping)
-    df['Cluster_Clouds'] = df['Cluster Label_Clouds'].map(cluster_mapping)
-    df['Cluster_Snow_Temp'] = df['Cluster Label_Snow_Temp'].map(cluster_mapping)
-    df['Cluster_Pressure_Wind'] = df['Cluster Label_Pressure_Wind'].map(cluster_mapping)
-    df['Cluster_Wind_Pressure'] = df['Cluster Label_Wind_Pressure'].map(cluster_mapping)
+    return schema.apply(df)  # Return the cleaned data with compact dtypes (float32 measurements, categorical labels)
 
-    return df  # Return the cleaned and processed DataFrame
+# Function to show the measured vs predicted plot in a window
+def plot_measured_vs_predicted(y_range, y_test, y_pred):
+    plt.figure(figsize=(10, 6))
+    plt.scatter(y_test, y_pred, color='blue', edgecolor='k', alpha=0.7)  # Scatter plot of actual vs predicted values
+    plt.plot(y_range, y_range, 'k--', lw=3)  # Plot a diagonal line (y=x) over the range of the target for reference
+    plt.xlabel('Measured')  # X-axis label
+    plt.ylabel('Predicted')  # Y-axis label
+    plt.title('Measured vs Predicted Values')  # Plot title
+    plt.show()  # Display the plot
 
-# Function to train and save the model
-def train_and_save_model(df, features, target, model_path):
+# Function to fit the model on a train/test split; returns the model and what the evaluation and the plot need
+def fit_model(df, features, target):
     X = df[features]  # Select the features (independent variables)
     y = df[target]  # Select the target variable (dependent variable)
 
@@ -37,22 +54,39 @@ def train_and_save_model(df, features, target, model_path):
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     model = LinearRegression()  # Initialize a linear regression model
-    model.fit(X_train, y_train)  # Train the model on the training data
+    with instrumentation.stage('regression.fit', rows=len(X_train)):
+        model.fit(X_train, y_train)  # Train the model on the training data
 
-    # Save the trained model to a file
-    joblib.dump(model, model_path)
-    print(f'Model saved to {model_path}')
+    with instrumentation.stage('regression.predict', rows=len(X_test)):
+        y_pred = model.predict(X_test)  # Predict the target variable for the test set
 
-    # Plotting the results
-    y_pred = model.predict(X_test)  # Predict the target variable for the test set
+    return {'model': model, 'y_test': y_test, 'y_pred': y_pred, 'y_range': (y.min(), y.max())}
 
-    plt.figure(figsize=(10, 6))
-    plt.scatter(y_test, y_pred, color='blue', edgecolor='k', alpha=0.7)  # Scatter plot of actual vs predicted values
-    plt.plot([y.min(), y.max()], [y.min(), y.max()], 'k--', lw=3)  # Plot a diagonal line (y=x) for reference
-    plt.xlabel('Measured')  # X-axis label
-    plt.ylabel('Predicted')  # Y-axis label
-    plt.title('Measured vs Predicted Values')  # Plot title
-    plt.show()  # Display the plot
+# Function to train and save the model
+def train_and_save_model(df, features, target, model_path, plot_path=None):
+    return save_and_evaluate(fit_model(df, features, target), features, model_path, plot_path)
+
+# Function to save a fitted model, plot its test predictions and return the evaluation metrics
+def save_and_evaluate(fitted, features, model_path, plot_path=None):
+    model, y_test, y_pred = fitted['model'], fitted['y_test'], fitted['y_pred']
+
+    with instrumentation.stage('regression.save'):
+        # Save the trained model to a file
+        joblib.dump(model, model_path)
+        print(f'Model saved to {model_path}')
+
+        # Save the compact artifact the dashboards load without sklearn
+        artifact = model_artifact.artifact_from_model(model, features, cluster_index.load_index())
+        print(f'Model artifact saved to {model_artifact.save_artifact(artifact)}')
+
+    # Plotting the results
+    if plot_path is not None:  # Headless mode: render the plot to a file instead of opening a window
+        plot_rendering.render(plot_rendering.scatter_task(plot_path, y_test, y_pred, title='Measured vs Predicted Values',
+                                                          xlabel='Measured', ylabel='Predicted', reference_line=fitted['y_range'],
+                                                          figsize=(10, 6)))
+        print(f'Plot saved to {plot_path}')
+    else:
+        plot_measured_vs_predicted(fitted['y_range'], y_test, y_pred)
 
     # Return evaluation metrics
     mse = mean_squared_error(y_test, y_pred)  # Calculate Mean Squared Error
@@ -62,23 +96,38 @@ def train_and_save_model(df, features, target, model_path):
     return mse, mae, r2  # Return the calculated metrics
 
 # Main function to execute the script
-def main():
+def main(plot_dir=None, plot_format='png'):
     file_path = 'final_data_with_clusters.csv'
     model_path = 'linear_regression_model_with_clusters.pkl'
     
-    df = load_data(file_path)
-    print("Data loaded successfully.")  # depuration message
+    features = feature_registry.MODEL_FEATURES  # Shared with the dashboards
+    target = feature_registry.TARGET
 
-    features = ['Month', 'Wind Speed (m/s)', 'Precipitation Level (mm)', 'Sun Duration (hours)', 
-                'Snow Height (cm)', 'Cloud Cover (octaves)', 'Vapor Pressure (hPa)', 
-                'Atmospheric Pressure (hPa)', 'Relative Humidity (%)']
-    target = 'Average Temperature (°C)'
-    
-    mse, mae, r2 = train_and_save_model(df, features, target, model_path)
+    # Load and fit as cached pipeline stages: the CSV is read and the model refitted only when the data,
+    # the features or the loading and fitting code changed
+    pipeline = stage_cache.Pipeline()
+    pipeline.add('load_data', load_data, params={'file_path': file_path}, files=[file_path], store=False,
+                 extra={'parser': data_cache.parser_fingerprint(parse_data)})
+    pipeline.add('fit_model', fit_model, inputs=['load_data'], params={'features': features, 'target': target},
+                 extra={'sklearn': sklearn.__version__})
+    fitted = pipeline.run('fit_model')
+    if 'load_data' in pipeline.values:
+        df = pipeline.values['load_data']
+        print(f"Data loaded successfully: {len(df)} rows, {schema.memory_usage(df) / 2 ** 20:.1f} MiB.")  # depuration message
+    else:
+        print('Model fit unchanged, reused from the stage cache.')
+
+    plot_path = os.path.join(plot_dir, f'measured_vs_predicted.{plot_format}') if plot_dir else None
+    mse, mae, r2 = save_and_evaluate(fitted, features, model_path, plot_path)
     
     print(f'Mean Squared Error: {mse}')
     print(f'Mean Absolute Error: {mae}')
     print(f'R² Score: {r2}')
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the temperature regression model on final_data_with_clusters.csv')
+    parser.add_argument('--plot-dir', default=None, help='Render the plot to this directory instead of showing it (for unattended runs)')
+    parser.add_argument('--plot-format', default='png', choices=['png', 'svg'], help='File format of the rendered plot')
+    args = parser.parse_args()
+    with instrumentation.profile_run('linear_regression'):  # cProfile dump when CLIMATE_PROFILE_DIR is set
+        main(args.plot_dir, args.plot_format)
\ No newline at end of file
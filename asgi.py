@@ -0,0 +1,27 @@
+"""
+ASGI entry point: the prediction API (see prediction_api.py) at /api next to the dashboard.
+
+The dashboard selected by CLIMATE_DASHBOARD (see wsgi.py) runs unchanged
+behind a2wsgi's WSGIMiddleware (Starlette's own is deprecated; install with
+pip install a2wsgi starlette uvicorn), and the API shares its model,
+station models and prediction batcher. Serve it with uvicorn workers:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+or, for development:
+    uvicorn asgi:app --port 8050
+"""
+import importlib
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+import prediction_api
+import wsgi
+
+dashboard = importlib.import_module(wsgi.DASHBOARD)  # The module wsgi.py already imported
+api = prediction_api.create_app(dashboard.predictor, dashboard.station_models, dashboard.batcher)
+
+app = Starlette(routes=[
+    Mount('/api', app=api),
+    Mount('/', app=WSGIMiddleware(wsgi.server))  # Dash pages, callbacks and /metrics
+])
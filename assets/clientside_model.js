@@ -0,0 +1,71 @@
+// Clientside temperature predictions from the model payload built by clientside_model.py.
+// The model is linear, so a prediction is the intercept plus the coefficient times the value of every feature.
+// Callback arguments are the feature inputs in model order, followed by the model store.
+
+function predictLinear(model, values) {
+    let total = model.intercept;
+    for (let i = 0; i < model.features.length; i++) {
+        const feature = model.features[i];
+        let value = values[i];
+        if (value === null || value === undefined) {
+            return null;
+        }
+        if (feature.values) {  // Non-numeric input, e.g. a month name
+            if (!(String(value) in feature.values)) {
+                return null;
+            }
+            value = feature.values[String(value)];
+        }
+        total += feature.coef * value;
+    }
+    return total;
+}
+
+// Level of the cluster whose centroid is nearest to a value (binary search over the midpoints, see cluster_index.py)
+function nearestLevel(entry, value) {
+    let lo = 0;
+    let hi = entry.boundaries.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (value < entry.boundaries[mid]) {
+            hi = mid;
+        } else {
+            lo = mid + 1;
+        }
+    }
+    return entry.levels[lo];
+}
+
+function splitArguments(args) {
+    return {values: args.slice(0, -1), model: args[args.length - 1]};
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    clientside: {
+        // Text used by the dashboard with the month dropdown
+        predict_daily: function (...args) {
+            const {values, model} = splitArguments(args);
+            const prediction = model ? predictLinear(model, values) : null;
+            if (prediction === null) {
+                return window.dash_clientside.no_update;
+            }
+            return `The predicted average daily temperature is ${prediction.toFixed(2)} °C`;
+        },
+        // Text used by the dashboard with the month slider, including the temperature cluster
+        predict_with_cluster: function (...args) {
+            const {values, model} = splitArguments(args);
+            const prediction = model ? predictLinear(model, values) : null;
+            if (prediction === null) {
+                return window.dash_clientside.no_update;
+            }
+            let cluster;
+            if (model.temperature_clusters) {
+                const level = nearestLevel(model.temperature_clusters, prediction);
+                cluster = level.charAt(0).toUpperCase() + level.slice(1);
+            } else {
+                cluster = prediction < 10 ? 'Low' : prediction < 20 ? 'Medium' : 'High';
+            }
+            return `The predicted average temperature is: ${prediction.toFixed(2)} °C, which belongs to the ${cluster} cluster`;
+        }
+    }
+});
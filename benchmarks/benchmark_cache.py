@@ -0,0 +1,72 @@
+"""
+Cold vs warm load benchmark for the columnar data cache.
+
+For fulldata.csv (clustering input) and final_data_with_clusters.csv
+(regression input) it times the plain CSV parse, the first cached load
+(parse + write) and a warm cached load, and compares memory footprints.
+
+Run from the repository root:
+    python benchmarks/benchmark_cache.py
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import data_cache  # noqa: E402
+import generate_plots  # noqa: E402
+
+
+# Function to import "Linear Regression.py", whose file name is not a valid module name
+def load_regression_module():
+    spec = importlib.util.spec_from_file_location('linear_regression', os.path.join(ROOT, 'Linear Regression.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Function to time a callable over several repeats and return (best seconds, last result)
+def best_of(func, repeats):
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def benchmark(file_path, parse, repeats, cache_dir):
+    t_parse, parsed = best_of(lambda: parse(file_path), repeats)
+    data_cache.clear_cache(file_path, parse, cache_dir)
+    start = time.perf_counter()
+    data_cache.cached_load(file_path, parse, cache_dir)
+    t_cold = time.perf_counter() - start
+    t_warm, cached = best_of(lambda: data_cache.cached_load(file_path, parse, cache_dir), repeats)
+
+    print(f'{file_path} ({len(parsed)} rows, {parsed.shape[1]} columns)')
+    print(f'  CSV parse        {t_parse * 1000:10.1f} ms  {megabytes(parsed):8.2f} MB')
+    print(f'  cache cold       {t_cold * 1000:10.1f} ms')
+    print(f'  cache warm       {t_warm * 1000:10.1f} ms  {megabytes(cached):8.2f} MB  ({t_parse / t_warm:.1f}x faster)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5, help='Repeats for the parse and warm-load timings')
+    args = parser.parse_args()
+
+    regression = load_regression_module()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        benchmark('fulldata.csv', generate_plots.parse_data, args.repeats, cache_dir)
+        benchmark('final_data_with_clusters.csv', regression.parse_data, args.repeats, cache_dir)
+
+
+if __name__ == '__main__':
+    main()
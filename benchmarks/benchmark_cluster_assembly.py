@@ -0,0 +1,62 @@
+"""
+Check and time the single-step cluster column assembly against the old merge chain.
+
+Runs the clustering jobs once, then builds the final data both ways: with
+the chain of per-job merges on 'Date' the clustering script used before,
+and with the aligned assembly it uses now. The merge chain only keeps the
+rows every job clustered, the assembly keeps all rows with empty cluster
+columns where a job skipped them; on the rows the merge chain keeps, the
+two frames must be identical. The timings of both assemblies are printed.
+
+Run from the repository root:
+    python benchmarks/benchmark_cluster_assembly.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import generate_plots as clustering  # noqa: E402
+
+
+# Function to rebuild the final data with the previous chain of merges on 'Date'
+def merge_chain(df, specs, results):
+    all_data = df
+    for spec, (data_final, _) in zip(specs, results):
+        selected = data_final[['Date', 'Cluster', 'Cluster Label']]
+        all_data = all_data.merge(selected, on='Date', suffixes=('', spec['suffix'] or '_Temp'))
+    return all_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='fulldata.csv', help='Raw station data')
+    parser.add_argument('--repeats', type=int, default=5, help='Repeats for each assembly timing')
+    args = parser.parse_args()
+
+    df = clustering.load_data(args.data)
+    specs = clustering.CLUSTERING_SPECS
+    results = [clustering.run_clustering_job(df, spec) for spec in specs]
+
+    timings = {}
+    for name, assemble in [('merge chain', merge_chain), ('aligned assembly', clustering.assemble_cluster_columns)]:
+        best = float('inf')
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            frame = assemble(df, specs, results)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = (best, frame)
+
+    merged, assembled = timings['merge chain'][1], timings['aligned assembly'][1]
+    complete = assembled.dropna(subset=[f"Cluster{spec['suffix']}" for spec in specs]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(merged, complete, check_dtype=False)  # Cluster ids are float in the assembly (NaN for skipped rows)
+    print(f'{len(df)} rows, {len(complete)} clustered by every job, {len(specs)} clustering jobs: outputs are identical')
+    for name, (seconds, _) in timings.items():
+        print(f'{name:18s} {seconds * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
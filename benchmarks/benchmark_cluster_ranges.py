@@ -0,0 +1,73 @@
+"""
+Benchmark the grouped cluster range computation against the per-cluster mask loop.
+
+Generates n rows with k random cluster ids and times the previous
+get_cluster_ranges (three boolean masks and two .loc assignments per
+cluster) against the grouped-aggregation version used by the clustering
+script, checking that both produce the same ranges. Neither writes per-row
+Min/Max columns any more; the ranges go into the cluster index.
+
+Run from the repository root:
+    python benchmarks/benchmark_cluster_ranges.py --rows 100000 1000000 5000000 --clusters 3 10 50
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import generate_plots as clustering  # noqa: E402
+
+VARIABLE = 'Average Temperature (°C)'
+
+
+# Function with the previous per-cluster implementation, kept as the reference
+def mask_loop_ranges(data_final, kmeans, variable):
+    cluster_ranges = {}
+    for cluster in range(kmeans.n_clusters):
+        cluster_data = data_final[data_final['Cluster'] == cluster]
+        min_val = cluster_data[variable].min()
+        max_val = cluster_data[variable].max()
+        cluster_ranges[cluster] = {'min': min_val, 'max': max_val}
+    return data_final, cluster_ranges
+
+
+# Function to build a clustered frame with n rows and k clusters
+def synthetic_frame(n_rows, n_clusters, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        VARIABLE: rng.normal(10, 8, n_rows),
+        'Cluster': rng.integers(0, n_clusters, n_rows, dtype=np.int32)
+    })
+
+
+def timed(func, frame, kmeans):
+    frame = frame.copy()
+    start = time.perf_counter()
+    result = func(frame, kmeans, VARIABLE)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 5000000], help='Row counts to test')
+    parser.add_argument('--clusters', type=int, nargs='+', default=[3, 10, 50], help='Cluster counts to test')
+    args = parser.parse_args()
+
+    print(f'{"rows":>10s} {"k":>4s} {"mask loop":>12s} {"grouped":>12s} {"speedup":>8s}')
+    for n_rows in args.rows:
+        for n_clusters in args.clusters:
+            frame = synthetic_frame(n_rows, n_clusters)
+            kmeans = SimpleNamespace(n_clusters=n_clusters)
+            t_loop, (_, loop_ranges) = timed(mask_loop_ranges, frame, kmeans)
+            t_grouped, (_, grouped_ranges) = timed(clustering.get_cluster_ranges, frame, kmeans)
+            assert loop_ranges == grouped_ranges
+            print(f'{n_rows:10d} {n_clusters:4d} {t_loop:10.3f} s {t_grouped:10.3f} s {t_loop / t_grouped:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+End-to-end benchmark of the pipeline on synthetic multi-station data.
+
+Generates DWD product files for the requested number of stations and years
+(see synthetic_data.py), then runs and times every stage in one process:
+    ingest       product files -> station store -> fulldata.csv layout
+    clean        parse and quality-filter the CSV (generate_plots.parse_data)
+    cluster      fit the KMeans of every clustering spec
+    range_label  cluster ranges, labels and the assembled cluster columns
+    train        fit the linear temperature model
+    predict      batch prediction over all training rows
+For each stage it records the wall time, the rows handled, and the RSS at
+the start and at its peak (sampled by a background thread; where
+/proc/self/statm is not available the process peak from getrusage is used).
+The results are saved as JSON together with the commit, so two runs can be
+compared stage by stage.
+
+Run from the repository root:
+    python benchmarks/benchmark_pipeline.py --stations 100 --years 50 --output pipeline_benchmark.json
+    python benchmarks/benchmark_pipeline.py --stations 100 --years 50 --compare pipeline_benchmark.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import feature_registry  # noqa: E402
+import generate_plots as clustering  # noqa: E402
+import ingest  # noqa: E402
+import instrumentation  # noqa: E402
+import prediction_service  # noqa: E402
+import synthetic_data  # noqa: E402
+
+SAMPLE_INTERVAL = 0.01  # Seconds between RSS samples
+MB = 1 << 20
+
+
+# Peak RSS while a block runs, sampled by a background thread
+class RssSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start = self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        rss = instrumentation.current_rss()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start = instrumentation.current_rss()
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        if self.peak is None:  # No /proc: fall back to the process peak, which includes earlier stages
+            self.start, self.peak = None, instrumentation.process_peak_rss()
+        return False
+
+
+def megabytes(value):
+    return None if value is None else round(value / MB, 1)
+
+
+# Function to time a stage and record its rows and memory; the block sets stage['rows']
+@contextlib.contextmanager
+def measure(name, stages):
+    stage = {'stage': name, 'rows': None}
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        yield stage
+        stage['seconds'] = round(time.perf_counter() - start, 4)
+    stage['rss_start_mb'] = megabytes(rss.start)
+    stage['peak_rss_mb'] = megabytes(rss.peak)
+    stages.append(stage)
+    print(f"{name:12s} {stage['seconds']:9.3f} s  {stage['rows'] or 0:>10d} rows  peak RSS {stage['peak_rss_mb']} MB")
+
+
+# Function to get the commit being benchmarked (None outside a git checkout)
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Function to run every stage of the pipeline on synthetic data in a working directory
+def run_pipeline(workdir, stations, years, seed=42):
+    from sklearn.linear_model import LinearRegression
+
+    stages = []
+    product_dir, store = os.path.join(workdir, 'products'), os.path.join(workdir, 'station_store')
+    fulldata_path = os.path.join(workdir, 'fulldata.csv')
+
+    with measure('generate', stages):
+        paths = synthetic_data.generate(product_dir, stations, years, seed)
+
+    with measure('ingest', stages) as stage:
+        ingest.ingest_paths(paths, store, os.path.join(ROOT, ingest.METADATA_PATH))
+        stage['rows'] = ingest.export_csv(fulldata_path, store)
+
+    with measure('clean', stages) as stage:
+        df = clustering.parse_data(fulldata_path)
+        stage['rows'] = len(df)
+
+    specs = clustering.CLUSTERING_SPECS
+    with measure('cluster', stages) as stage:
+        fitted = [clustering.apply_clustering(df, spec['variables'], random_state=spec.get('random_state', clustering.RANDOM_STATE))
+                  for spec in specs]
+        stage['rows'] = sum(len(data_final) for data_final, _ in fitted)
+
+    with measure('range_label', stages) as stage:
+        results = [clustering.label_clustering_job(data_final, kmeans, spec) for spec, (data_final, kmeans) in zip(specs, fitted)]
+        all_data = clustering.assemble_cluster_columns(df, specs, results)
+        stage['rows'] = len(all_data)
+
+    features, target = feature_registry.MODEL_FEATURES, feature_registry.TARGET
+    with measure('train', stages) as stage:
+        training = all_data.dropna(subset=feature_registry.MEASUREMENT_FEATURES + [target])  # Same rows as Linear Regression.py
+        model = LinearRegression().fit(training[features], training[target])
+        stage['rows'] = len(training)
+
+    with measure('predict', stages) as stage:
+        predictor = prediction_service.LinearPredictor.from_model(model, features)
+        stage['rows'] = len(predictor.predict(training[features].to_numpy()))
+
+    return stages
+
+
+# Function to print the change of every stage against a previous result; returns the stages slower than the tolerance
+def compare(result, previous, tolerance):
+    before = {stage['stage']: stage for stage in previous['stages']}
+    regressions = []
+    print(f"Against {previous.get('commit') or 'previous run'} ({previous['config']}):")
+    for stage in result['stages']:
+        old = before.get(stage['stage'])
+        if old is None or not old['seconds']:
+            continue
+        change = stage['seconds'] / old['seconds'] - 1
+        flag = ''
+        if change > tolerance:
+            regressions.append(stage['stage'])
+            flag = '  REGRESSION'
+        print(f"  {stage['stage']:12s} {old['seconds']:9.3f} s -> {stage['seconds']:9.3f} s  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stations', type=int, default=10, help='Number of stations (1 to 1000)')
+    parser.add_argument('--years', type=int, default=30, help='Years of daily data per station (10 to 70)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the synthetic data')
+    parser.add_argument('--workdir', default=None, help='Keep the generated files here (default: a temporary directory)')
+    parser.add_argument('--output', default='pipeline_benchmark.json', help='Where to save the results')
+    parser.add_argument('--compare', default=None, help='Previous results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Slowdown of a stage reported as a regression')
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:  # Read first: the output may overwrite it
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix='pipeline_benchmark_'))
+        stages = run_pipeline(workdir, args.stations, args.years, args.seed)
+
+    result = {
+        'commit': git_commit(),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {'stations': args.stations, 'years': args.years, 'seed': args.seed},
+        'process_peak_rss_mb': megabytes(instrumentation.process_peak_rss()),
+        'stages': stages
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f'Results saved to {args.output}')
+
+    if previous is not None and compare(result, previous, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
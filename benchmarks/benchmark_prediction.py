@@ -0,0 +1,82 @@
+"""
+Throughput benchmark: per-click prediction vs the batched prediction service.
+
+Compares the dashboards' previous path (one single-row DataFrame and one
+model.predict call per request) with a single vectorized call over all rows
+and with concurrent single-row requests going through the MicroBatcher.
+
+Run from the repository root:
+    python benchmarks/benchmark_prediction.py --rows 10000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import feature_registry  # noqa: E402
+import prediction_service  # noqa: E402
+
+# Slider ranges used by the dashboards
+FEATURE_RANGES = {feature['name']: feature['slider'][:2] for feature in feature_registry.FEATURES}
+
+
+# Function to draw random feature rows inside the slider ranges
+def random_rows(features, n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    low = np.array([FEATURE_RANGES[f][0] for f in features], dtype=np.float64)
+    high = np.array([FEATURE_RANGES[f][1] for f in features], dtype=np.float64)
+    return rng.uniform(low, high, size=(n_rows, len(features)))
+
+
+# Function to time a callable and return (seconds, result)
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def per_click(model, features, X):
+    # One DataFrame and one predict call per row, as the callbacks used to do
+    return np.array([model.predict(pd.DataFrame({f: [v] for f, v in zip(features, row)}))[0] for row in X])
+
+
+def batched_concurrent(predictor, X, n_threads):
+    batcher = prediction_service.MicroBatcher(predictor)
+    try:
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            return np.array(list(pool.map(batcher.predict_one, X)))
+    finally:
+        batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='Number of feature rows to score')
+    parser.add_argument('--threads', type=int, default=32, help='Concurrent clients for the micro-batched path')
+    parser.add_argument('--model', default=prediction_service.MODEL_PATH, help='Path to the trained model')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    predictor = prediction_service.load_predictor(args.model)
+    X = random_rows(predictor.features, args.rows)
+
+    t_click, y_click = timed(lambda: per_click(model, predictor.features, X))
+    t_vector, y_vector = timed(lambda: predictor.predict(X))
+    t_batch, y_batch = timed(lambda: batched_concurrent(predictor, X, args.threads))
+
+    print(f'Rows scored: {args.rows}')
+    for name, seconds in [('per-click DataFrame', t_click), ('vectorized batch', t_vector),
+                          (f'micro-batched ({args.threads} clients)', t_batch)]:
+        print(f'{name:32s} {seconds:10.4f} s {args.rows / seconds:14.0f} rows/s {t_click / seconds:8.1f}x')
+    print(f'Max abs difference vs per-click: vectorized {np.abs(y_vector - y_click).max():.2e}, '
+          f'micro-batched {np.abs(y_batch - y_click).max():.2e}')
+
+
+if __name__ == '__main__':
+    main()
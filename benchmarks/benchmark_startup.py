@@ -0,0 +1,67 @@
+"""
+Benchmark dashboard startup with the pickled model against the JSON artifact.
+
+Each measurement is a fresh interpreter, so import and load costs are
+counted as a cold start would see them. Three stages are timed:
+    imports   the dashboards' previous top-level imports (dash, pandas, joblib)
+              against the current ones (dash, prediction_service)
+    load      joblib.load of the pickle (pulls in sklearn) against
+              model_artifact.load_artifact
+    app       importing the whole dashboard module with CLIMATE_MODEL_PATH
+              pointing at each model file
+
+The JSON artifact is written from the pickle first if it does not exist.
+
+Run from the repository root:
+    python benchmarks/benchmark_startup.py --repeat 5 --app Cluster
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import model_artifact  # noqa: E402
+
+STAGES = {
+    'imports': ('import dash, joblib, pandas', 'import dash, prediction_service'),
+    'load': (f'import joblib; joblib.load({model_artifact.PICKLE_PATH!r})',
+             f'import model_artifact; model_artifact.load_artifact({model_artifact.ARTIFACT_PATH!r})')
+}
+
+
+# Function to time a snippet in fresh interpreters and return the median in seconds
+def cold_start(code, repeat, env=None):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per measurement')
+    parser.add_argument('--app', default='Cluster', help='Dashboard module to import for the app stage')
+    args = parser.parse_args()
+
+    if not os.path.exists(model_artifact.ARTIFACT_PATH):
+        model_artifact.main()
+
+    stages = dict(STAGES)
+    stages['app'] = (f'import {args.app}', f'import {args.app}')
+    print(f'{"stage":>8s} {"pickle":>10s} {"artifact":>10s} {"speedup":>8s}')
+    for stage, (before, after) in stages.items():
+        env_before = dict(os.environ, CLIMATE_MODEL_PATH=model_artifact.PICKLE_PATH)
+        env_after = dict(os.environ, CLIMATE_MODEL_PATH=model_artifact.ARTIFACT_PATH)
+        t_before = cold_start(before, args.repeat, env_before)
+        t_after = cold_start(after, args.repeat, env_after)
+        print(f'{stage:>8s} {t_before:8.3f} s {t_after:8.3f} s {t_before / t_after:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
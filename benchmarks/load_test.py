@@ -0,0 +1,132 @@
+"""
+Load test for the server-side predict callback of a running dashboard.
+
+Start a dashboard first, for example:
+    gunicorn -c gunicorn.conf.py wsgi:server
+or the development server (python Cluster.py). The script reads the callback
+definitions and the layout from the server, then sends Predict button
+callbacks at increasing concurrency and reports throughput and p50/p99
+latency. By default every request uses fresh random feature values so the
+prediction cache is not hit; pass --cached to replay the layout defaults.
+
+Run from the repository root:
+    python benchmarks/load_test.py --url http://127.0.0.1:8050 --concurrency 1 4 16 64 --requests 2000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BUTTON = 'predict-button'
+
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+# Function to turn a component id into the string form used by _dash-dependencies
+# (pattern-matching dict ids are serialized as compact JSON with sorted keys)
+def id_key(component_id):
+    return component_id if isinstance(component_id, str) else json.dumps(component_id, sort_keys=True, separators=(',', ':'))
+
+
+# Function to turn a _dash-dependencies id back into the id sent with a callback request
+def request_id(component_id):
+    return json.loads(component_id) if component_id.startswith('{') else component_id
+
+
+# Function to collect {id key: props} for every component with an id in the layout tree
+def layout_components(node, found=None):
+    found = {} if found is None else found
+    if isinstance(node, list):
+        for child in node:
+            layout_components(child, found)
+    elif isinstance(node, dict) and 'props' in node:
+        props = node['props']
+        if props.get('id') is not None:
+            found[id_key(props['id'])] = props
+        layout_components(props.get('children'), found)
+    return found
+
+
+# Function to find the Predict button callback among the server's callback definitions
+def predict_callback(dependencies):
+    for callback in dependencies:
+        if any(i['id'] == BUTTON and i['property'] == 'n_clicks' for i in callback['inputs']):
+            return callback
+    raise SystemExit(f'No callback with {BUTTON}.n_clicks as input on this server')
+
+
+# Function to pick a state value: the layout default, or a random value on the component's range
+def state_value(props, randomize):
+    value = props.get('value')
+    if randomize and isinstance(value, (int, float)) and 'min' in props and 'max' in props:
+        step = props.get('step') or 1
+        value = round(props['min'] + step * random.randint(0, int((props['max'] - props['min']) / step)), 6)
+    elif randomize and props.get('options'):
+        option = random.choice(props['options'])
+        value = option['value'] if isinstance(option, dict) else option
+    return value
+
+
+# Function to build one _dash-update-component request body
+def request_body(callback, components, randomize):
+    output_id, output_property = callback['output'].split('@')[0].split('.')
+    return json.dumps({
+        'output': callback['output'],
+        'outputs': {'id': output_id, 'property': output_property},
+        'inputs': [{'id': BUTTON, 'property': 'n_clicks', 'value': 1}],
+        'state': [{'id': request_id(s['id']), 'property': s['property'], 'value': state_value(components.get(s['id'], {}), randomize)}
+                  for s in callback['state']],
+        'changedPropIds': [f'{BUTTON}.n_clicks']
+    }).encode()
+
+
+def timed_post(url, body):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+# Function to send n requests with the given concurrency and return (latencies, wall time)
+def run_level(url, bodies, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda body: timed_post(url, body), bodies))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help='Base URL of the running dashboard')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64], help='Concurrent clients per level')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level')
+    parser.add_argument('--cached', action='store_true', help='Replay the layout defaults instead of random values')
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/')
+    callback = predict_callback(get_json(f'{base}/_dash-dependencies'))
+    components = layout_components(get_json(f'{base}/_dash-layout'))
+    url = f'{base}/_dash-update-component'
+    run_level(url, [request_body(callback, components, not args.cached) for _ in range(50)], 4)  # Warm up
+
+    print(f'{"clients":>8s} {"req/s":>9s} {"p50 ms":>8s} {"p99 ms":>8s} {"max ms":>8s}')
+    for concurrency in args.concurrency:
+        bodies = [request_body(callback, components, not args.cached) for _ in range(args.requests)]
+        latencies, wall = run_level(url, bodies, concurrency)
+        print(f'{concurrency:8d} {len(latencies) / wall:9.1f} {percentile(latencies, 50) * 1000:8.2f} '
+              f'{percentile(latencies, 99) * 1000:8.2f} {max(latencies) * 1000:8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Load test for the prediction API (see prediction_api.py) of a running server.
+
+Start the dashboard with the API first, for example:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+or the development server (uvicorn asgi:app --port 8050). The script reads
+the feature order from /api/features, sends single-row predictions at
+increasing concurrency and reports throughput and p50/p99 latency, then
+posts batches of random rows as a JSON array and as an NDJSON stream and
+reports rows per second and the time to the first byte of the response.
+Every row has fresh random values within the dashboard slider ranges.
+
+Run from the repository root:
+    python benchmarks/load_test_api.py --url http://127.0.0.1:8050 --concurrency 1 4 16 64 --requests 2000 --batch-rows 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import feature_registry  # noqa: E402
+import load_test  # noqa: E402
+
+NDJSON = 'application/x-ndjson'
+
+
+# Function to draw a feature row in the API's feature order, within each feature's slider range
+def random_row(features):
+    row = []
+    for name in features:
+        low, high, step = next(feature['slider'] for feature in feature_registry.FEATURES if feature['name'] == name)
+        row.append(round(low + step * random.randint(0, int((high - low) / step)), 6))
+    return row
+
+
+# Function to post one batch and return (predictions received, seconds to the first byte, total seconds)
+def post_batch(url, body, content_type, accept):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type, 'Accept': accept})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        first = response.read(1)
+        first_byte = time.perf_counter() - start
+        payload = first + response.read()
+    total = time.perf_counter() - start
+    if accept == NDJSON:
+        received = payload.count(b'\n')
+    else:
+        received = len(json.loads(payload))
+    return received, first_byte, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help='Base URL of the running server')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64], help='Concurrent clients per level')
+    parser.add_argument('--requests', type=int, default=2000, help='Single-row requests per concurrency level')
+    parser.add_argument('--batch-rows', type=int, default=100000, help='Rows per batch request')
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/')
+    features = load_test.get_json(f'{base}/api/features')['features']
+    url = f'{base}/api/predict'
+    load_test.run_level(url, [json.dumps(random_row(features)).encode() for _ in range(50)], 4)  # Warm up
+
+    print(f'{"clients":>8s} {"req/s":>9s} {"p50 ms":>8s} {"p99 ms":>8s} {"max ms":>8s}')
+    for concurrency in args.concurrency:
+        bodies = [json.dumps(dict(zip(features, random_row(features)))).encode() for _ in range(args.requests)]
+        latencies, wall = load_test.run_level(url, bodies, concurrency)
+        print(f'{concurrency:8d} {len(latencies) / wall:9.1f} {load_test.percentile(latencies, 50) * 1000:8.2f} '
+              f'{load_test.percentile(latencies, 99) * 1000:8.2f} {max(latencies) * 1000:8.2f}')
+
+    rows = [random_row(features) for _ in range(args.batch_rows)]
+    batches = [('JSON array', json.dumps(rows).encode(), 'application/json', 'application/json'),
+               ('NDJSON', ''.join(json.dumps(row) + '\n' for row in rows).encode(), NDJSON, NDJSON)]
+    print(f'\n{"batch":>10s} {"rows":>9s} {"rows/s":>11s} {"first byte ms":>14s} {"total ms":>9s}')
+    for name, body, content_type, accept in batches:
+        received, first_byte, total = post_batch(f'{base}/api/predict/batch', body, content_type, accept)
+        if received != len(rows):
+            raise SystemExit(f'{name}: sent {len(rows)} rows but received {received} predictions')
+        print(f'{name:>10s} {received:9d} {received / total:11.0f} {first_byte * 1000:14.2f} {total * 1000:9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Synthetic DWD daily climate data for benchmarks.
+
+Writes one produkt_klima_tag_<from>_<to>_<station>.txt file per station in
+the layout of the real product files (semicolon separated, padded header,
+-999 for missing values, trailing eor column), so the files go through
+ingest.py like downloaded ones. Each station gets its own climate offset
+and the series follow the seasonal cycle with autocorrelated anomalies:
+max/min/soil temperatures around the daily mean, zero-inflated
+precipitation with its form code, snow in cold spells, cloud cover and sun
+duration tied to precipitation, and pressure, wind, humidity and vapor
+pressure in realistic ranges. Like the real record, the sun, cloud,
+pressure and humidity series start years after the temperature series,
+older days have lower quality levels, and a small share of values is
+missing at random.
+
+Run from the repository root:
+    python benchmarks/synthetic_data.py --stations 100 --years 50 --output synthetic_data
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+LAST_YEAR = 2023
+MISSING_VALUE = -999
+MISSING_SHARE = 0.005  # Share of values missing at random in every measured column
+LATE_COLUMNS = ['SDK', 'NM', 'VPM', 'PM', 'UPM', 'TGK']  # Series that start after the temperature series
+WIND_COLUMNS = ['QN_3', 'FX', 'FM']
+COLUMNS = ['STATIONS_ID', 'MESS_DATUM', 'QN_3', 'FX', 'FM', 'QN_4', 'RSK', 'RSKF', 'SDK', 'SHK_TAG', 'NM', 'VPM', 'PM',
+           'TMK', 'UPM', 'TXK', 'TNK', 'TGK', 'eor']
+
+
+# Function to draw an autocorrelated (AR(1)) series with unit variance
+def anomaly(rng, n, persistence):
+    noise = pd.Series(rng.standard_normal(n))
+    series = noise.ewm(alpha=1 - persistence, adjust=False).mean().to_numpy()
+    return series / series.std()
+
+
+# Function to generate the daily rows of one station in the product file layout
+def station_frame(station, first_year, last_year, rng):
+    dates = pd.date_range(f'{first_year}-01-01', f'{last_year}-12-31', freq='D')
+    n = len(dates)
+    season = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 200) / 365.25)  # 1 in mid-July, -1 in mid-January
+    offset = rng.normal(0, 2)  # Station climate (altitude, latitude)
+
+    tmk = 9 + offset + 9.5 * season + 3.5 * anomaly(rng, n, 0.8)
+    txk = tmk + 4 + 2 * season + rng.gamma(2, 0.8, n)
+    tnk = tmk - 3.5 - 1.5 * season - rng.gamma(2, 0.8, n)
+    tgk = tnk - np.abs(rng.normal(1.5, 1, n))
+
+    wet = rng.random(n) < 0.45 - 0.05 * season
+    rsk = np.where(wet, rng.gamma(0.8, 4.5, n), 0)
+    rskf = np.select([~wet, tmk > 2, tmk < -1], [0, 6, 7], default=8)  # No precipitation, rain, snow, mixed
+    rskf = np.where(rng.random(n) < 0.005, 9, rskf)  # Form not known
+    shk = np.clip(np.round(-3 * pd.Series(tmk).ewm(span=10).mean().to_numpy() + rng.normal(0, 2, n)), 0, None)
+
+    nm = np.clip(4.5 + 2 * wet - season + rng.normal(0, 1.5, n), 0, 8)
+    day_length = 12.2 + 4 * season
+    sdk = np.clip(day_length * (1 - nm / 8) * rng.uniform(0.6, 1.1, n), 0, day_length)
+    pm = 950 + offset + 8 * anomaly(rng, n, 0.7)
+    fm = rng.gamma(2.5, 1.1, n) + np.clip(950 - pm, 0, None) * 0.2
+    fx = fm * rng.uniform(1.8, 3.2, n)
+    upm = np.clip(78 - 10 * season + 8 * wet + rng.normal(0, 6, n), 20, 100)
+    vpm = 6.112 * np.exp(17.62 * tmk / (243.12 + tmk)) * upm / 100  # Saturation vapor pressure (Magnus) times humidity
+
+    years = dates.year.to_numpy()
+    quality = np.where(years < 1979, 5, 10)
+    df = pd.DataFrame({
+        'STATIONS_ID': station,
+        'MESS_DATUM': (years * 10000 + dates.month.to_numpy() * 100 + dates.day.to_numpy()),
+        'QN_3': quality, 'FX': fx, 'FM': fm,
+        'QN_4': np.where(rng.random(n) < 0.01, 1, quality),  # A few days with only the formal check
+        'RSK': rsk, 'RSKF': rskf, 'SDK': sdk, 'SHK_TAG': shk, 'NM': nm, 'VPM': vpm, 'PM': pm,
+        'TMK': tmk, 'UPM': upm, 'TXK': txk, 'TNK': tnk, 'TGK': tgk,
+        'eor': 'eor'
+    }, columns=COLUMNS)
+    measured = COLUMNS[2:-1]
+    df[measured] = df[measured].round(1)
+
+    # Missing values: the late series start some years in, the wind series later still, plus random gaps
+    late_start = first_year + rng.integers(0, max(1, (last_year - first_year) // 2) + 1)
+    df.loc[years < late_start, LATE_COLUMNS] = MISSING_VALUE
+    df.loc[years < late_start + rng.integers(0, 6), WIND_COLUMNS] = MISSING_VALUE
+    gaps = rng.random((n, len(measured))) < MISSING_SHARE
+    df[measured] = df[measured].mask(gaps, MISSING_VALUE)
+    return df
+
+
+# Function to write a station's rows as a product file, returning its path
+def write_station(df, directory):
+    first, last = df['MESS_DATUM'].iloc[0], df['MESS_DATUM'].iloc[-1]
+    path = os.path.join(directory, f"produkt_klima_tag_{first}_{last}_{df['STATIONS_ID'].iloc[0]:05d}.txt")
+    header = {column: f'{column:>4s}' for column in df.columns}  # Padded like the DWD header ('  FX')
+    df.rename(columns=header).to_csv(path, sep=';', index=False, float_format='%.1f')
+    return path
+
+
+# Function to generate product files for a number of stations and years, returning their paths
+def generate(directory, stations=10, years=30, seed=42, last_year=LAST_YEAR):
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    station_ids = np.sort(rng.choice(np.arange(1, 20000), size=stations, replace=False))
+    return [write_station(station_frame(int(station), last_year - years + 1, last_year, rng), directory) for station in station_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stations', type=int, default=10, help='Number of stations (1 to 1000)')
+    parser.add_argument('--years', type=int, default=30, help='Years of daily data per station (10 to 70)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', default='synthetic_data', help='Directory of the generated product files')
+    args = parser.parse_args()
+
+    paths = generate(args.output, args.stations, args.years, args.seed)
+    print(f'Wrote {len(paths)} station files to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
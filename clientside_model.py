@@ -0,0 +1,59 @@
+"""
+Clientside predictions for the dashboard sliders.
+
+The temperature model is linear, so a prediction is the intercept plus the
+coefficient times the value of every feature. The coefficients and the
+intercept are shipped to the browser in a dcc.Store, and
+assets/clientside_model.js computes the prediction in a clientside
+callback: predictions update live as the sliders move, without any server
+call. Inputs that are not numbers (month names from a dropdown) are mapped
+to the numeric values the model was trained on. Non-linear models do not
+split into per-feature terms; the dashboards predict them on the server
+only.
+
+Server-side predictions (the Predict button) go through an LRU cache of
+recent results.
+"""
+import functools
+
+import numpy as np
+
+MONTH_NUMBERS = {
+    'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
+    'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
+}
+CACHE_SIZE = 4096  # Recent server-side predictions kept in memory
+
+
+# Function to describe a linear model for the browser: intercept and one coefficient per feature, in model order.
+# categorical maps a feature to {input value: numeric value} (e.g. month names from a dropdown).
+# Returns None for non-linear models; the dashboards then predict on the server only.
+def model_payload(predictor, categorical=None):
+    if not hasattr(predictor, 'coef'):
+        return None
+    categorical = categorical or {}
+    features = []
+    for feature, coef in zip(predictor.features, predictor.coef.tolist()):
+        entry = {'name': feature, 'coef': coef}
+        if feature in categorical:
+            entry['values'] = {str(key): value for key, value in categorical[feature].items()}
+        features.append(entry)
+    return {'intercept': predictor.intercept, 'features': features}
+
+
+# Function to predict from a model payload in Python (mirrors assets/clientside_model.js)
+def predict_clientside(model, values):
+    total = model['intercept']
+    for feature, value in zip(model['features'], values):
+        if 'values' in feature:
+            value = feature['values'][str(value)]
+        total += feature['coef'] * value
+    return total
+
+
+# Function to wrap a MicroBatcher in an LRU cache keyed on the feature row
+def cached_predictor(batcher, maxsize=CACHE_SIZE):
+    @functools.lru_cache(maxsize=maxsize)
+    def predict(row):
+        return batcher.predict_one(np.array(row, dtype=np.float64))
+    return predict
@@ -0,0 +1,77 @@
+"""
+Lookup index of the cluster ranges learned by the clustering script.
+
+For every clustered variable the index keeps the clusters sorted by their
+centroid along that variable, with each cluster's min, max, centroid and
+label, plus the midpoints between neighbouring centroids. A value belongs
+to the cluster with the nearest centroid, which in one dimension is a
+binary search over those midpoints (O(log k)). The index is a small JSON
+file, so the dashboards load it without sklearn.
+
+generate_plots.py writes it next to kmeans_models.pkl, and so does
+streaming_clustering.py --promote.
+"""
+import bisect
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(BASE_DIR, 'cluster_index.json')
+LEVELS = ['low', 'medium', 'high']  # Level names of the clusters, in centroid order, when there are three
+DECIMALS = 3  # Stored precision, so float32 noise (958.7000122070312) does not reach the sliders
+
+
+# Function to build the index entry of one fitted clustering (see generate_plots.fitted_clustering)
+def index_entry(fitted):
+    position = fitted['variables'].index(fitted['variable'])
+    centroids = [round(float(center[position]), DECIMALS) for center in fitted['kmeans'].cluster_centers_]
+    order = sorted(range(len(centroids)), key=centroids.__getitem__)
+    clusters = [{
+        'cluster': cluster,
+        'label': fitted['labels'][cluster],
+        'min': round(float(fitted['ranges'][cluster]['min']), DECIMALS),
+        'max': round(float(fitted['ranges'][cluster]['max']), DECIMALS),
+        'centroid': centroids[cluster]
+    } for cluster in order]
+    return {
+        'clusters': clusters,
+        'boundaries': [(a['centroid'] + b['centroid']) / 2 for a, b in zip(clusters, clusters[1:])],
+        'levels': LEVELS if len(clusters) == len(LEVELS) else [c['label'] for c in clusters]
+    }
+
+
+# Function to build the index of all fitted clusterings, keyed by their variable
+def build_index(fitted_models):
+    return {fitted['variable']: index_entry(fitted) for fitted in fitted_models}
+
+
+# Function to write the index, replacing the file atomically
+def save_index(index, path=INDEX_PATH):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# Function to read the index; empty if the clustering script has not been run
+def load_index(path=INDEX_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Function to find the position (in centroid order) of the cluster nearest to a value
+def nearest(entry, value):
+    return bisect.bisect_right(entry['boundaries'], value)
+
+
+# Function to find the level name of the cluster nearest to a value
+def classify(entry, value):
+    return entry['levels'][nearest(entry, value)]
+
+
+# Function to find the (min, max) range of the cluster with a level name
+def level_range(entry, level):
+    cluster = entry['clusters'][entry['levels'].index(level)]
+    return cluster['min'], cluster['max']
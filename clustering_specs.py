@@ -0,0 +1,46 @@
+"""
+Clustering jobs of generate_plots.py, as plain data.
+
+Kept apart from the clustering script so that modules which only need the
+specs do not import sklearn and matplotlib with it.
+"""
+
+# Clustering jobs: variables to cluster on, variable used for the ranges and label order,
+# labels from lowest to highest range, column suffix in the final data, and scatter plot settings
+CLUSTERING_SPECS = [
+    {'variables': ['Average Temperature (°C)', 'Maximum Temperature (°C)', 'Minimum Temperature (°C)'],
+     'variable': 'Average Temperature (°C)',
+     'labels': ['Cold temperature', 'Cool temperature', 'Hot temperature'],
+     'suffix': '',
+     'plot': {'x_var': 'Month', 'y_var': 'Average Temperature (°C)', 'title': 'Temperature Clusters by Month and Average Temperature', 'month_labels': True}},
+    {'variables': ['Sun Duration (hours)', 'Cloud Cover (octaves)'],
+     'variable': 'Sun Duration (hours)',
+     'labels': ['Low sun duration', 'Medium sun duration', 'High sun duration'],
+     'suffix': '_Sun',
+     'plot': {'x_var': 'Sun Duration (hours)', 'y_var': 'Cloud Cover (octaves)', 'title': 'Sun Duration Clusters by Cloud Cover'}},
+    {'variables': ['Precipitation Level (mm)', 'Cloud Cover (octaves)'],
+     'variable': 'Precipitation Level (mm)',
+     'labels': ['Low precipitation', 'Medium precipitation', 'High precipitation'],
+     'suffix': '_Precip',
+     'plot': {'x_var': 'Precipitation Level (mm)', 'y_var': 'Cloud Cover (octaves)', 'title': 'Precipitation Clusters by Cloud Cover'}},
+    {'variables': ['Cloud Cover (octaves)', 'Precipitation Level (mm)'],
+     'variable': 'Cloud Cover (octaves)',
+     'labels': ['Low Cloud Cover', 'Medium Cloud Cover', 'High Cloud Cover'],
+     'suffix': '_Clouds',
+     'plot': {'x_var': 'Cloud Cover (octaves)', 'y_var': 'Precipitation Level (mm)', 'title': 'Cloud Cover by Precipitation Level'}},
+    {'variables': ['Snow Height (cm)', 'Average Temperature (°C)'],
+     'variable': 'Snow Height (cm)',
+     'labels': ['High snow', 'Light snow', 'No snow'],
+     'suffix': '_Snow_Temp',
+     'plot': {'x_var': 'Average Temperature (°C)', 'y_var': 'Snow Height (cm)', 'title': 'Snow Clusters by Average Temperature'}},
+    {'variables': ['Atmospheric Pressure (hPa)', 'Wind Speed (m/s)'],
+     'variable': 'Atmospheric Pressure (hPa)',
+     'labels': ['Low Pressure', 'Medium Pressure', 'High Pressure'],
+     'suffix': '_Pressure_Wind',
+     'plot': {'x_var': 'Atmospheric Pressure (hPa)', 'y_var': 'Wind Speed (m/s)', 'title': 'Pressure by Wind'}},
+    {'variables': ['Wind Speed (m/s)', 'Atmospheric Pressure (hPa)'],
+     'variable': 'Wind Speed (m/s)',
+     'labels': ['Low Wind', 'Medium Wind', 'High Wind'],
+     'suffix': '_Wind_Pressure',
+     'plot': {'x_var': 'Wind Speed (m/s)', 'y_var': 'Atmospheric Pressure (hPa)', 'title': 'Wind by Pressure'}}
+]
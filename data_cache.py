@@ -0,0 +1,223 @@
+"""
+Columnar on-disk cache for cleaned station data.
+
+The first load parses the CSV as before, converts every column to its compact
+dtype from schema.py (float32 measurements, int8 codes, categorical labels)
+and saves one .npy file per column next to a JSON manifest. Later loads
+memory-map those files instead of parsing the CSV again, and the DataFrame
+is built on the maps without copying them (copy-on-write maps, so writing
+to a column never touches the cache). The cache lives in .cache next to
+this module, one directory per source file (by its absolute path) and
+parser. A cached copy is used while the source file's modification time or
+SHA-1 hash and the source of the parser function, the helpers it calls and
+every project module they use (with their constants, such as
+quality.REJECTED_CODES) are unchanged, so editing the data, the cleaning
+code, the quality thresholds or the schema rebuilds it.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import schema
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '.cache')
+MANIFEST = 'manifest.json'
+INDEX_FILE = '__index__.npy'
+HASH_CHUNK_SIZE = 1 << 20
+CATEGORY_CODE_DTYPE = 'int16'
+
+
+# Function to compute the SHA-1 hash of a file without reading it all at once
+def file_sha1(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Function to check whether a module belongs to this project (not the standard library or a dependency)
+def _is_project_module(module):
+    path = getattr(module, '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == BASE_DIR
+
+
+# Function to collect the source of a project module and of the project modules it imports
+def _module_sources(module, seen):
+    if module in seen:
+        return []
+    seen.add(module)
+    try:
+        sources = [inspect.getsource(module)]
+    except (OSError, TypeError):
+        sources = [module.__name__]
+    for value in vars(module).values():
+        if inspect.ismodule(value) and _is_project_module(value):
+            sources.extend(_module_sources(value, seen))
+    return sources
+
+
+# Function to collect the source of a function, of the same-module functions it calls
+# and of the project modules they use (whole, so their constants count too)
+def _function_sources(func, seen):
+    func = inspect.unwrap(func)  # Follow decorators (e.g. instrumentation.timed) to the function they wrap
+    if func in seen:
+        return []
+    seen.add(func)
+    try:
+        sources = [inspect.getsource(func)]
+    except (OSError, TypeError):  # Source not available (e.g. interactive session); fall back to the name
+        sources = [f'{func.__module__}.{func.__qualname__}']
+    for name in func.__code__.co_names:
+        helper = func.__globals__.get(name)
+        if inspect.isfunction(helper) and helper.__module__ == func.__module__:
+            sources.extend(_function_sources(helper, seen))
+        elif inspect.ismodule(helper) and _is_project_module(helper) and helper.__name__ != func.__module__:
+            sources.extend(_module_sources(helper, seen))
+    return sources
+
+
+# Function to fingerprint the source of functions, of the same-module helpers they call and of the project modules they use
+def source_fingerprint(*funcs):
+    payload = json.dumps([_function_sources(func, set()) for func in funcs])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+# Function to fingerprint the parser so that changes to the cleaning code invalidate the cache
+def parser_fingerprint(parse):
+    # The schema module is always included: compact_column converts every column with it, whatever the parser uses
+    payload = json.dumps({'parser': _function_sources(parse, set()), 'schema': _module_sources(schema, set())})
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+# Function to get the cache directory used for a source file and parser; files with the same name in
+# different directories get their own cache
+def cache_path(file_path, parse, cache_dir=CACHE_DIR):
+    resolved = os.path.realpath(file_path)
+    base = os.path.splitext(os.path.basename(resolved))[0]
+    path_hash = hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f'{base}.{path_hash}.{parse.__name__}')
+
+
+# Function to convert one column to its compact representation: (values, categories or None)
+def compact_column(name, values):
+    values = schema.convert_column(name, values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]'), None
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=CATEGORY_CODE_DTYPE), [str(c) for c in values.cat.categories]
+    return values.to_numpy(), None
+
+
+# Function to convert a DataFrame to compact dtypes (the same conversion the cache applies)
+def compact_frame(df):
+    columns = {}
+    for name in df.columns:
+        values, categories = compact_column(name, df[name])
+        columns[name] = pd.Categorical.from_codes(values, categories) if categories is not None else values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(directory, manifest):
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+# Function to check whether the cached copy still matches the source file and parser
+def _is_fresh(directory, manifest, file_path, fingerprint):
+    if manifest is None or manifest.get('parser') != fingerprint:
+        return False
+    stat = os.stat(file_path)
+    if manifest['mtime_ns'] == stat.st_mtime_ns and manifest['size'] == stat.st_size:
+        return True
+    # The file was touched: it is still fresh if the content hash is unchanged
+    if manifest['size'] == stat.st_size and manifest['sha1'] == file_sha1(file_path):
+        manifest['mtime_ns'] = stat.st_mtime_ns
+        _write_manifest(directory, manifest)
+        return True
+    return False
+
+
+# Function to save a DataFrame as one .npy file per column plus a manifest
+def save_frame(df, directory, manifest):
+    tmp_dir = directory + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for position, name in enumerate(df.columns):
+        values, categories = compact_column(name, df[name])
+        file_name = f'{position:03d}.npy'
+        np.save(os.path.join(tmp_dir, file_name), values)
+        columns.append({'name': name, 'file': file_name, 'dtype': str(values.dtype), 'categories': categories})
+    np.save(os.path.join(tmp_dir, INDEX_FILE), df.index.to_numpy(dtype='int64'))
+    manifest = dict(manifest, columns=columns, rows=len(df))
+    _write_manifest(tmp_dir, manifest)
+    # Swap the new cache in only once it is complete
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+# Function to memory-map cached columns (all of them, or only the names given) with the row index;
+# mmap_mode='c' maps them copy-on-write, so they can be written without changing the files
+def load_columns(directory, names=None, manifest=None, mmap_mode='r'):
+    manifest = manifest or _read_manifest(directory)
+    columns = {}
+    for column in manifest['columns']:
+        if names is not None and column['name'] not in names:
+            continue
+        values = np.load(os.path.join(directory, column['file']), mmap_mode=mmap_mode)
+        if column['categories'] is not None:
+            values = pd.Categorical.from_codes(values, column['categories'])
+        columns[column['name']] = values
+    index = pd.Index(np.load(os.path.join(directory, INDEX_FILE), mmap_mode='r'))
+    return columns, index
+
+
+# Function to load a cached DataFrame, memory-mapping each column file. copy=False keeps one block per
+# column on its map instead of consolidating (copying) the columns into 2-D blocks
+def load_frame(directory, manifest=None, names=None):
+    columns, index = load_columns(directory, names, manifest, mmap_mode='c')
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+# Function to load a source file through the cache, parsing it only when needed
+def cached_load(file_path, parse, cache_dir=CACHE_DIR):
+    directory = cache_path(file_path, parse, cache_dir)
+    fingerprint = parser_fingerprint(parse)
+    manifest = _read_manifest(directory)
+    if _is_fresh(directory, manifest, file_path, fingerprint):
+        return load_frame(directory, manifest)
+
+    df = parse(file_path)  # Cold cache: parse the CSV and store the compact columns
+    stat = os.stat(file_path)
+    manifest = {
+        'source': os.path.abspath(file_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha1': file_sha1(file_path),
+        'parser': fingerprint
+    }
+    save_frame(df, directory, manifest)
+    return load_frame(directory)
+
+
+# Function to delete the cache for one source file, or the whole cache
+def clear_cache(file_path=None, parse=None, cache_dir=CACHE_DIR):
+    if file_path is None:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    else:
+        shutil.rmtree(cache_path(file_path, parse, cache_dir), ignore_errors=True)
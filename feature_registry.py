@@ -0,0 +1,100 @@
+"""
+Single definition of the temperature model's input features.
+
+Linear Regression.py trains on MODEL_FEATURES, and the dashboards build
+their inputs and callbacks from FEATURES, so adding a variable means adding
+one entry here. Every climate feature has:
+    key         short name used in component ids
+    slider      (min, max, step) of its dashboard slider
+    default     initial slider value
+    mark_step   spacing of the slider marks
+    icon        image in assets/
+    ranges      slider range (min, max) for each cluster level
+    thresholds  cut points between the cluster levels of a value
+
+slider, default, ranges and thresholds are fallbacks: when the clustering
+script has learned clusters for a feature, its cluster index (see
+cluster_index.py) is used instead, so the sliders span the values measured
+at the station and every cluster level can be selected. The fallbacks match
+the data of station 03379 (pressure around 910-980 hPa at its altitude).
+"""
+import bisect
+import math
+
+import cluster_index
+
+TARGET = 'Average Temperature (°C)'
+CLUSTER_LEVELS = cluster_index.LEVELS
+
+FEATURES = [
+    {'name': 'Month', 'key': 'month', 'slider': (1, 12, 1), 'default': 1},
+    {'name': 'Wind Speed (m/s)', 'key': 'wind_speed', 'slider': (0, 50, 0.1), 'default': 2.0, 'mark_step': 5,
+     'icon': 'wind.png', 'ranges': {'low': (0, 10), 'medium': (10, 20), 'high': (20, 50)}, 'thresholds': (10, 20)},
+    {'name': 'Precipitation Level (mm)', 'key': 'precipitation', 'slider': (0, 200, 0.1), 'default': 0.0, 'mark_step': 20,
+     'icon': 'precipitation.png', 'ranges': {'low': (0, 10), 'medium': (10, 50), 'high': (50, 200)}, 'thresholds': (50, 100)},
+    {'name': 'Sun Duration (hours)', 'key': 'sun_duration', 'slider': (0, 18, 0.1), 'default': 8.0, 'mark_step': 2,
+     'icon': 'sun.png', 'ranges': {'low': (0, 6), 'medium': (6, 12), 'high': (12, 18)}, 'thresholds': (6, 12)},
+    {'name': 'Snow Height (cm)', 'key': 'snow_height', 'slider': (0, 100, 0.1), 'default': 0.0, 'mark_step': 10,
+     'icon': 'snow.png', 'ranges': {'low': (0, 20), 'medium': (20, 50), 'high': (50, 100)}, 'thresholds': (20, 50)},
+    {'name': 'Cloud Cover (octaves)', 'key': 'cloud_cover', 'slider': (0, 8, 1), 'default': 4, 'mark_step': 1,
+     'icon': 'cloud.png', 'ranges': {'low': (0, 4), 'medium': (4, 6), 'high': (6, 8)}, 'thresholds': (3, 6)},
+    {'name': 'Vapor Pressure (hPa)', 'key': 'vapor_pressure', 'slider': (0, 30, 0.1), 'default': 10.0, 'mark_step': 5,
+     'icon': 'vapor.png', 'ranges': {'low': (0, 10), 'medium': (10, 20), 'high': (20, 30)}, 'thresholds': (10, 20)},
+    {'name': 'Atmospheric Pressure (hPa)', 'key': 'atmospheric_pressure', 'slider': (900, 1000, 0.1), 'default': 955.0, 'mark_step': 10,
+     'icon': 'pressure.png', 'ranges': {'low': (900, 950), 'medium': (950, 960), 'high': (960, 1000)}, 'thresholds': (950, 960)},
+    {'name': 'Relative Humidity (%)', 'key': 'humidity', 'slider': (0, 100, 0.1), 'default': 50.0, 'mark_step': 10,
+     'icon': 'humidity.png', 'ranges': {'low': (0, 50), 'medium': (50, 75), 'high': (75, 100)}, 'thresholds': (30, 70)}
+]
+
+MODEL_FEATURES = [feature['name'] for feature in FEATURES]  # Training and prediction column order
+DATE_FEATURES = ['Month']  # Derived from the date, never missing
+MEASUREMENT_FEATURES = [name for name in MODEL_FEATURES if name not in DATE_FEATURES]  # Daily measurements, may be missing
+CLIMATE_FEATURES = [feature for feature in FEATURES if 'ranges' in feature]  # Features with a cluster selector
+FEATURES_BY_KEY = {feature['key']: feature for feature in FEATURES}
+
+
+# Pattern-matching id of a feature's slider; pass dash.MATCH or dash.ALL as the key for wildcard callbacks
+def slider_id(key):
+    return {'type': 'feature-slider', 'feature': key}
+
+
+# Pattern-matching id of a feature's cluster selector
+def cluster_id(key):
+    return {'type': 'feature-cluster', 'feature': key}
+
+
+# Function to get a feature's slider (min, max, step, default), spanning its learned clusters when available.
+# The bounds are rounded outwards to the mark spacing; a default outside them moves to the middle cluster's centroid.
+def slider(key, index=None):
+    feature = FEATURES_BY_KEY[key]
+    low, high, step = feature['slider']
+    default = feature['default']
+    if index and feature['name'] in index:
+        clusters = index[feature['name']]['clusters']
+        mark_step = feature.get('mark_step', 1)
+        low = math.floor(min(cluster['min'] for cluster in clusters) / mark_step) * mark_step
+        high = math.ceil(max(cluster['max'] for cluster in clusters) / mark_step) * mark_step
+        if not low <= default <= high:
+            default = round(round(clusters[len(clusters) // 2]['centroid'] / step) * step, 6)
+    return low, high, step, default
+
+
+# Function to get the marks of a feature's slider, one every mark_step between its bounds
+def slider_marks(key, low, high):
+    return {i: str(i) for i in range(low, high + 1, FEATURES_BY_KEY[key].get('mark_step', 1))}
+
+
+# Function to find the cluster level of a feature value, from the learned index when available
+def classify(key, value, index=None):
+    feature = FEATURES_BY_KEY[key]
+    if index and feature['name'] in index:
+        return cluster_index.classify(index[feature['name']], value)
+    return CLUSTER_LEVELS[bisect.bisect_right(feature['thresholds'], value)]
+
+
+# Function to find the (min, max) range of a feature's cluster level, from the learned index when available
+def cluster_range(key, level, index=None):
+    feature = FEATURES_BY_KEY[key]
+    if index and feature['name'] in index:
+        return cluster_index.level_range(index[feature['name']], level)
+    return feature['ranges'][level]
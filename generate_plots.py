@@ -1,59 +1,98 @@
 # Import necessary libraries
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.cluster import KMeans
+from threadpoolctl import threadpool_limits
 import matplotlib.pyplot as plt
+import joblib
+import cluster_index
+import clustering_specs
+import data_cache
+import instrumentation
+import plot_rendering
+import quality
+import schema
+import stage_cache
 
-# Function to load and clean the data
+MODELS_PATH = 'kmeans_models.pkl'  # Fitted KMeans models, reused to cluster new days without refitting
+RANDOM_STATE = 42  # Default KMeans seed; a clustering spec can set its own 'random_state'
+N_INIT = 'auto'  # Number of KMeans initialisations, explicit so results do not depend on the sklearn version
+
+# Function to load the cleaned data, reusing the columnar cache when fulldata.csv is unchanged
+@instrumentation.timed('clustering.load_data')
 def load_data(file_path):
-    df = pd.read_csv(file_path, delimiter=',')  # Load the dataset from a CSV file
+    return data_cache.cached_load(file_path, parse_data)  # Parses the CSV only when the cache is cold or stale
+
+# Function to parse and clean the raw data
+def parse_data(file_path):
+    df = pd.read_csv(file_path, delimiter=',', usecols=schema.keep_column)  # Load the dataset from a CSV file, without the eor column
+    return clean_data(df)
+
+# Function to clean raw DWD rows (also used for days added by the incremental update)
+def clean_data(df):
     df.columns = df.columns.str.strip()  # Remove any leading or trailing spaces from column names
-    df.replace(-999, pd.NA, inplace=True)  # Replace placeholder values (-999) with NaN (missing value indicator)
-    df.dropna(inplace=True)  # Drop rows with missing values
+    df = df.drop(columns=schema.DROPPED_COLUMNS, errors='ignore')  # Drop the constant end-of-record column
+    # Mask missing (-999), quality-rejected and unknown (e.g. RSKF 9 precipitation) values column by column;
+    # each clustering drops only the rows it cannot use
+    df = quality.mask_invalid(df)
+    measurements = [c for columns in quality.QUALITY_GROUPS.values() for c in columns if c in df.columns]
+    df = df.dropna(subset=measurements, how='all')  # Drop days without any measurement
     df['MESS_DATUM'] = pd.to_datetime(df['MESS_DATUM'], format='%Y%m%d')  # Convert date column to datetime format
-    # Rename columns for better readability and understanding
-    df.columns = [
-        'STATIONS_ID', 'Date', 'QN_3', 'FX', 'Wind Speed (m/s)', 'QN_4', 'Precipitation Level (mm)', 'RSKF', 
-        'Sun Duration (hours)', 'Snow Height (cm)', 'Cloud Cover (octaves)', 'Vapor Pressure (hPa)', 
-        'Atmospheric Pressure (hPa)', 'Average Temperature (°C)', 'Relative Humidity (%)', 'Maximum Temperature (°C)', 
-        'Minimum Temperature (°C)', 'Soil Minimum Temperature (°C)', 'eor'
-    ]
-    df = df[df['RSKF'] != 9]  # Filter out rows where the 'RSKF' value is 9 (likely an outlier or unwanted value)
+    df = df.rename(columns=schema.COLUMN_NAMES)  # Rename columns for better readability and understanding
     df['Month'] = df['Date'].dt.month  # Extract the month from the 'Date' column and create a 'Month' column
-    return df  # Return the cleaned and processed DataFrame
+    return schema.apply(df)  # Return the cleaned data with compact dtypes (float32 measurements, int8 codes)
 
 # Function to apply KMeans clustering to selected variables
-def apply_clustering(df, variables, n_clusters=3):
-    data_selected = df[variables].copy()  # Select the relevant variables for clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42)  # Initialize KMeans with the specified number of clusters
-    data_selected['Cluster'] = kmeans.fit_predict(data_selected)  # Fit KMeans and assign cluster labels to the data
+@instrumentation.timed('clustering.apply_clustering')
+def apply_clustering(df, variables, n_clusters=3, random_state=RANDOM_STATE, n_init=N_INIT):
+    data_selected = df[variables].dropna()  # Select the relevant variables for clustering, on the rows where all of them are valid
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init)  # Initialize KMeans with the specified number of clusters
+    data_selected['Cluster'] = kmeans.fit_predict(data_selected).astype(schema.CLUSTER_DTYPE)  # Fit KMeans and assign cluster labels to the data
     # Combine the cluster data with the original date and month for further analysis
-    data_final = pd.concat([data_selected, df[['Date', 'Month']]], axis=1)
+    data_final = pd.concat([data_selected, df.loc[data_selected.index, ['Date', 'Month']]], axis=1)
     return data_final, kmeans  # Return the clustered data and the KMeans model
 
-# Function to calculate the range (min and max) for each cluster for a specified variable
+# Function to compute min/max/mean/count of the given variables for all clusters in one grouped pass
+def cluster_statistics(data_final, variables, n_clusters):
+    stats = data_final.groupby('Cluster', sort=True)[variables].agg(['min', 'max', 'mean', 'count'])
+    return stats.reindex(range(n_clusters))  # One row per cluster, NaN for clusters without rows
+
+# Function to calculate the range (min and max) for each cluster for a specified variable.
+# The ranges are kept per cluster (they go into the cluster index), not repeated on every row.
 def get_cluster_ranges(data_final, kmeans, variable):
-    cluster_ranges = {}
-    # Iterate over each cluster to calculate the min and max values for the selected variable
-    for cluster in range(kmeans.n_clusters):
-        cluster_data = data_final[data_final['Cluster'] == cluster]  # Get data for the current cluster
-        min_val = cluster_data[variable].min()  # Calculate the minimum value for the variable in this cluster
-        max_val = cluster_data[variable].max()  # Calculate the maximum value for the variable in this cluster
-        cluster_ranges[cluster] = {'min': min_val, 'max': max_val}  # Store the min and max values in a dictionary
-        # Add columns to the data for the min and max values of the variable within each cluster
-        data_final.loc[data_final['Cluster'] == cluster, f'{variable} Min'] = min_val
-        data_final.loc[data_final['Cluster'] == cluster, f'{variable} Max'] = max_val
-    return data_final, cluster_ranges  # Return the updated data and the cluster ranges
+    stats = cluster_statistics(data_final, [variable], kmeans.n_clusters)[variable]
+    mins, maxs = stats['min'].to_numpy(), stats['max'].to_numpy()
+    cluster_ranges = {cluster: {'min': mins[cluster], 'max': maxs[cluster]} for cluster in range(kmeans.n_clusters)}
+    return data_final, cluster_ranges  # Return the data and the cluster ranges
 
 # Function to label clusters based on their ranges
 def label_clusters(cluster_ranges, labels):
-    # Sort clusters by their minimum value to map them to meaningful labels
-    sorted_clusters = sorted(cluster_ranges.items(), key=lambda x: x[1]['min'])
-    # Map sorted clusters to the provided labels
-    cluster_labels = {cluster: label for cluster, label in zip([c[0] for c in sorted_clusters], labels)}
-    return cluster_labels  # Return the dictionary mapping clusters to labels
+    clusters = np.fromiter(cluster_ranges.keys(), dtype=np.int64)
+    mins = np.array([ranges['min'] for ranges in cluster_ranges.values()], dtype=np.float64)
+    # Order clusters by their minimum value (stable, like sorted) and map them to the provided labels
+    ordered = clusters[np.argsort(mins, kind='stable')]
+    return dict(zip(ordered.tolist(), labels))  # Return the dictionary mapping clusters to labels
+
+# Function to bundle a fitted clustering with its ranges and labels for later reuse
+def fitted_clustering(kmeans, variable, cluster_ranges, cluster_labels, suffix):
+    return {
+        'kmeans': kmeans,
+        'variables': list(kmeans.feature_names_in_),  # Columns the model was fitted on, in order
+        'variable': variable,  # Variable used for the cluster ranges and for ranking the labels
+        'ranges': cluster_ranges,
+        'labels': cluster_labels,
+        'suffix': suffix  # Suffix of the Cluster/Cluster Label columns in final_data_with_clusters.csv
+    }
 
 # Function to generate a scatter plot of clusters
-def generate_scatter_plot(data_final, x_var, y_var, cluster_labels, title, month_labels=False):
+def generate_scatter_plot(data_final, x_var, y_var, cluster_labels, title, month_labels=False, output_path=None):
+    if output_path is not None:  # Headless mode: render to a file instead of opening a window
+        return plot_rendering.render(cluster_plot_task(data_final, x_var, y_var, cluster_labels, title, month_labels, output_path))
     colors = {0: 'blue', 1: 'green', 2: 'red'}  # Define colors for each cluster
 
     plt.figure(figsize=(12, 6))  # Set the size of the plot
@@ -72,84 +111,161 @@ def generate_scatter_plot(data_final, x_var, y_var, cluster_labels, title, month
     
     plt.show()  # Display the plot
 
+# Function to describe a cluster scatter plot as a headless render task
+def cluster_plot_task(data_final, x_var, y_var, cluster_labels, title, month_labels=False, output_path=None):
+    return plot_rendering.scatter_task(output_path, data_final[x_var], data_final[y_var], data_final['Cluster'], cluster_labels,
+                                       title=title, xlabel=x_var, ylabel=y_var, month_labels=month_labels)
+
+CLUSTERING_SPECS = clustering_specs.CLUSTERING_SPECS  # Clustering jobs (see clustering_specs.py)
+
+# Function to run one clustering job: fit, compute ranges and map labels
+def run_clustering_job(df, spec, n_clusters=3):
+    data_final, kmeans = apply_clustering(df, spec['variables'], n_clusters=n_clusters, random_state=spec.get('random_state', RANDOM_STATE))
+    return label_clustering_job(data_final, kmeans, spec)
+
+# Function to compute the cluster ranges of a fitted job and map its labels
+@instrumentation.timed('clustering.label_clustering_job')
+def label_clustering_job(data_final, kmeans, spec):
+    data_final, cluster_ranges = get_cluster_ranges(data_final, kmeans, spec['variable'])
+    cluster_labels = label_clusters(cluster_ranges, spec['labels'])
+    # Map cluster labels to the data, as a categorical holding each label once
+    data_final['Cluster Label'] = pd.Categorical(data_final['Cluster'].map(cluster_labels), categories=spec['labels'])
+    return data_final, fitted_clustering(kmeans, spec['variable'], cluster_ranges, cluster_labels, spec['suffix'])
+
+# Function to get the output columns of a job: (column in data_final, column in the final data)
+def job_columns(spec):
+    suffix = spec['suffix']
+    return [('Cluster', f'Cluster{suffix}'), ('Cluster Label', f'Cluster Label{suffix}')]  # Ranges are in the cluster index
+
+# Function to add the columns of every job next to the original data in a single step
+@instrumentation.timed('clustering.assemble_cluster_columns')
+def assemble_cluster_columns(df, specs, results):
+    columns = {}
+    for spec, (data_final, _) in zip(specs, results):
+        for source, target in job_columns(spec):
+            # Rows a job could not cluster are left empty; labels stay categorical
+            columns[target] = schema.convert_column(target, data_final[source].reindex(df.index))
+    return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1).reset_index(drop=True)
+
+# Per-process state of the clustering workers, set once by _init_worker
+_shared_columns = None
+_thread_limits = None
+
+# Function to prepare a clustering worker: memory-map the cached data once instead of receiving a pickled DataFrame
+def _init_worker(cache_directory, threads):
+    global _shared_columns, _thread_limits
+    _shared_columns = data_cache.load_columns(cache_directory)
+    _thread_limits = threadpool_limits(limits=threads)  # Keep workers from oversubscribing the cores with OpenMP threads
+
+# Function to run one clustering job inside a worker on the shared read-only columns
+def _clustering_worker(spec, n_clusters):
+    columns, index = _shared_columns
+    needed = list(dict.fromkeys(spec['variables'] + ['Date', 'Month']))  # Only the job's columns are copied out of the map
+    frame = pd.DataFrame({name: columns[name] for name in needed}, index=index)
+    start = time.perf_counter()
+    data_final, fitted = run_clustering_job(frame, spec, n_clusters)
+    return data_final, fitted, time.perf_counter() - start
+
+# Function to run clustering jobs on the shared index; returns the (data_final, fitted) results and their wall times.
+# With workers > 1 the jobs run in a process pool over the cached copy of file_path (df must come from load_data).
+def fit_clustering_jobs(df, specs=CLUSTERING_SPECS, n_clusters=3, workers=1, file_path=None):
+    if workers > 1:
+        if file_path is None:
+            raise ValueError('file_path is required to share the cached data with the worker processes')
+        directory = data_cache.cache_path(file_path, parse_data)
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory, threads)) as pool:
+            futures = [pool.submit(_clustering_worker, spec, n_clusters) for spec in specs]
+            outputs = [future.result() for future in futures]
+        results = [(data_final, fitted) for data_final, fitted, _ in outputs]
+        timings = [seconds for _, _, seconds in outputs]
+    else:
+        results, timings = [], []
+        for spec in specs:
+            start = time.perf_counter()
+            results.append(run_clustering_job(df, spec, n_clusters))
+            timings.append(time.perf_counter() - start)
+    return results, timings
+
+# Function to run all clustering jobs and assemble the final data
+@instrumentation.timed('clustering.run_clustering_jobs')
+def run_clustering_jobs(df, specs=CLUSTERING_SPECS, n_clusters=3, workers=1, file_path=None):
+    results, timings = fit_clustering_jobs(df, specs, n_clusters, workers, file_path)
+    return assemble_cluster_columns(df, specs, results), results, timings
+
+# Function to get the pipeline stage name of a clustering job
+def job_stage(spec):
+    return f"clustering{spec['suffix']}"
+
+# Function to describe the clustering as a pipeline: the cleaned data, then one cached stage per clustering job.
+# A job's output is reused while fulldata.csv, the cleaning and clustering code, its spec and the sklearn version are unchanged.
+def clustering_pipeline(file_path, specs=CLUSTERING_SPECS, n_clusters=3, cache=None):
+    pipeline = stage_cache.Pipeline(cache)
+    # Not stored again: the columnar cache already keeps the cleaned data
+    pipeline.add('load_data', load_data, params={'file_path': file_path}, files=[file_path], store=False,
+                 extra={'parser': data_cache.parser_fingerprint(parse_data)})
+    for spec in specs:
+        job_spec = {name: value for name, value in spec.items() if name != 'plot'}  # Plot settings do not change the fit
+        pipeline.add(job_stage(spec), run_clustering_job, inputs=['load_data'], params={'spec': job_spec, 'n_clusters': n_clusters},
+                     extra={'random_state': RANDOM_STATE, 'n_init': N_INIT, 'sklearn': sklearn.__version__})
+    return pipeline
+
 # Main function to execute the clustering and plotting
-def main():
+def main(workers=None, plot_dir=None, plot_format='png'):
     file_path = 'fulldata.csv' # Path to the input data file
-    df = load_data(file_path)  # Load and clean the data
-
-    # Apply clustering and generate a plot for temperature-related variables
-    data_final_1, kmeans_1 = apply_clustering(df, ['Average Temperature (°C)', 'Maximum Temperature (°C)', 'Minimum Temperature (°C)'], n_clusters=3)
-    data_final_1, cluster_ranges_1 = get_cluster_ranges(data_final_1, kmeans_1, 'Average Temperature (°C)')
-    cluster_labels_1 = label_clusters(cluster_ranges_1, ['Cold temperature', 'Cool temperature', 'Hot temperature'])
-    data_final_1['Cluster Label'] = data_final_1['Cluster'].map(cluster_labels_1)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = df.merge(data_final_1[['Date', 'Cluster', 'Cluster Label', 'Average Temperature (°C) Min', 'Average Temperature (°C) Max']], on='Date', suffixes=('', '_Temp'))
-    # Generate a scatter plot for temperature clusters by month
-    generate_scatter_plot(data_final_1, 'Month', 'Average Temperature (°C)', cluster_labels_1, 'Temperature Clusters by Month and Average Temperature', month_labels=True)
-
-    # Apply clustering and generate a plot for sun duration and cloud cover
-    data_final_2, kmeans_2 = apply_clustering(df, ['Sun Duration (hours)', 'Cloud Cover (octaves)'], n_clusters=3)
-    data_final_2, cluster_ranges_2 = get_cluster_ranges(data_final_2, kmeans_2, 'Sun Duration (hours)')
-    cluster_labels_2 = label_clusters(cluster_ranges_2, ['Low sun duration', 'Medium sun duration', 'High sun duration'])
-    data_final_2['Cluster Label'] = data_final_2['Cluster'].map(cluster_labels_2)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = all_data.merge(data_final_2[['Date', 'Cluster', 'Cluster Label', 'Sun Duration (hours) Min', 'Sun Duration (hours) Max']], on='Date', suffixes=('', '_Sun'))
-    # Generate a scatter plot for sun duration clusters by cloud cover
-    generate_scatter_plot(data_final_2, 'Sun Duration (hours)', 'Cloud Cover (octaves)', cluster_labels_2, 'Sun Duration Clusters by Cloud Cover')
-
-    # Apply clustering and generate a plot for precipitation level and cloud cover
-    data_final_3, kmeans_3 = apply_clustering(df, ['Precipitation Level (mm)', 'Cloud Cover (octaves)'], n_clusters=3)
-    data_final_3, cluster_ranges_3 = get_cluster_ranges(data_final_3, kmeans_3, 'Precipitation Level (mm)')
-    cluster_labels_3 = label_clusters(cluster_ranges_3, ['Low precipitation', 'Medium precipitation', 'High precipitation'])
-    data_final_3['Cluster Label'] = data_final_3['Cluster'].map(cluster_labels_3)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = all_data.merge(data_final_3[['Date', 'Cluster', 'Cluster Label', 'Precipitation Level (mm) Min', 'Precipitation Level (mm) Max']], on='Date', suffixes=('', '_Precip'))
-    # Generate a scatter plot for precipitation clusters by cloud cover
-    generate_scatter_plot(data_final_3, 'Precipitation Level (mm)', 'Cloud Cover (octaves)', cluster_labels_3, 'Precipitation Clusters by Cloud Cover')
-
-    # Apply clustering and generate a plot for cloud cover and precipitation level
-    data_final_5, kmeans_5 = apply_clustering(df, ['Cloud Cover (octaves)', 'Precipitation Level (mm)'], n_clusters=3)
-    data_final_5, cluster_ranges_5 = get_cluster_ranges(data_final_5, kmeans_5, 'Cloud Cover (octaves)')
-    cluster_labels_5 = label_clusters(cluster_ranges_5, ['Low Cloud Cover', 'Medium Cloud Cover', 'High Cloud Cover'])
-    data_final_5['Cluster Label'] = data_final_5['Cluster'].map(cluster_labels_5)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = all_data.merge(data_final_5[['Date', 'Cluster', 'Cluster Label', 'Cloud Cover (octaves) Min', 'Cloud Cover (octaves) Max']], on='Date', suffixes=('', '_Clouds'))
-    # Generate a scatter plot for cloud cover clusters by precipitation level
-    generate_scatter_plot(data_final_5, 'Cloud Cover (octaves)', 'Precipitation Level (mm)', cluster_labels_5, 'Cloud Cover by Precipitation Level')
-
-    # Apply clustering and generate a plot for snow height and average temperature
-    data_final_6, kmeans_6 = apply_clustering(df, ['Snow Height (cm)', 'Average Temperature (°C)'], n_clusters=3)
-    data_final_6, cluster_ranges_6 = get_cluster_ranges(data_final_6, kmeans_6, 'Snow Height (cm)')
-    cluster_labels_6 = label_clusters(cluster_ranges_6, ['High snow', 'Light snow', 'No snow'])
-    data_final_6['Cluster Label'] = data_final_6['Cluster'].map(cluster_labels_6)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = all_data.merge(data_final_6[['Date', 'Cluster', 'Cluster Label', 'Snow Height (cm) Min', 'Snow Height (cm) Max']], on='Date', suffixes=('', '_Snow_Temp'))
-    # Generate a scatter plot for snow clusters by average temperature
-    generate_scatter_plot(data_final_6, 'Average Temperature (°C)', 'Snow Height (cm)', cluster_labels_6, 'Snow Clusters by Average Temperature')
-
-    # Apply clustering and generate a plot for atmospheric pressure and wind speed
-    data_final_7, kmeans_7 = apply_clustering(df, ['Atmospheric Pressure (hPa)', 'Wind Speed (m/s)'], n_clusters=3)
-    data_final_7, cluster_ranges_7 = get_cluster_ranges(data_final_7, kmeans_7, 'Atmospheric Pressure (hPa)')
-    cluster_labels_7 = label_clusters(cluster_ranges_7, ['Low Pressure', 'Medium Pressure', 'High Pressure'])
-    data_final_7['Cluster Label'] = data_final_7['Cluster'].map(cluster_labels_7)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = all_data.merge(data_final_7[['Date', 'Cluster', 'Cluster Label', 'Atmospheric Pressure (hPa) Min', 'Atmospheric Pressure (hPa) Max']], on='Date', suffixes=('', '_Pressure_Wind'))
-    # Generate a scatter plot for atmospheric pressure clusters by wind speed
-    generate_scatter_plot(data_final_7, 'Atmospheric Pressure (hPa)', 'Wind Speed (m/s)', cluster_labels_7, 'Pressure by Wind')
-
-    # Apply clustering and generate a plot for wind speed and atmospheric pressure
-    data_final_8, kmeans_8 = apply_clustering(df, ['Wind Speed (m/s)', 'Atmospheric Pressure (hPa)'], n_clusters=3)
-    data_final_8, cluster_ranges_8 = get_cluster_ranges(data_final_8, kmeans_8, 'Wind Speed (m/s)')
-    cluster_labels_8 = label_clusters(cluster_ranges_8, ['Low Wind', 'Medium Wind', 'High Wind'])
-    data_final_8['Cluster Label'] = data_final_8['Cluster'].map(cluster_labels_8)  # Map cluster labels to the data
-    # Merge with the original data to include cluster information
-    all_data = all_data.merge(data_final_8[['Date', 'Cluster', 'Cluster Label', 'Wind Speed (m/s) Min', 'Wind Speed (m/s) Max']], on='Date', suffixes=('', '_Wind_Pressure'))
-    # Generate a scatter plot for wind speed clusters by atmospheric pressure
-    generate_scatter_plot(data_final_8, 'Wind Speed (m/s)', 'Atmospheric Pressure (hPa)', cluster_labels_8, 'Wind by Pressure')
+    pipeline = clustering_pipeline(file_path)
+    df = pipeline.run('load_data')  # Load and clean the data
+    print(f'Loaded {len(df)} rows ({schema.memory_usage(df) / 2 ** 20:.1f} MiB)')  # Memory footprint of the compact columns
+
+    # Fit only the clustering jobs whose inputs changed since their output was cached, in parallel
+    workers = workers or min(len(CLUSTERING_SPECS), os.cpu_count() or 1)
+    missing = [spec for spec in CLUSTERING_SPECS if not pipeline.cached(job_stage(spec))]
+    timings = {}
+    if missing:
+        computed, seconds = fit_clustering_jobs(df, missing, workers=min(workers, len(missing)), file_path=file_path)
+        for spec, result, job_seconds in zip(missing, computed, seconds):
+            pipeline.put(job_stage(spec), result)
+            timings[job_stage(spec)] = job_seconds
+    results = [pipeline.run(job_stage(spec)) for spec in CLUSTERING_SPECS]
+    for spec in CLUSTERING_SPECS:
+        seconds = timings.get(job_stage(spec))
+        # Wall time of each job
+        print(f"Clustering on {', '.join(spec['variables'])}: {'cached' if seconds is None else f'{seconds:.2f} s'}")
+
+    # Assemble the cluster columns next to the original data
+    all_data = assemble_cluster_columns(df, CLUSTERING_SPECS, results)
+
+    with instrumentation.stage('clustering.plots'):
+        render_plots(results, workers, plot_dir, plot_format)
 
     # Save the final combined data with all cluster labels to a new CSV file
-    all_data.to_csv('final_data_with_clusters.csv', index=False)
+    with instrumentation.stage('clustering.save', rows=len(all_data)):
+        all_data.to_csv('final_data_with_clusters.csv', index=False)
+        # Save the fitted KMeans models so incremental updates can predict clusters without refitting
+        joblib.dump([fitted for _, fitted in results], MODELS_PATH)
+        # Save the per-cluster min/max/centroid lookup index used by the dashboards
+        cluster_index.save_index(cluster_index.build_index([fitted for _, fitted in results]))
+
+# Function to show the scatter plot of every clustering, or render them to files in plot_dir
+def render_plots(results, workers, plot_dir=None, plot_format='png'):
+    if plot_dir:
+        # Render every scatter plot to a file in parallel, without opening any window
+        tasks = [cluster_plot_task(data_final, cluster_labels=fitted['labels'], **spec['plot'],
+                                   output_path=os.path.join(plot_dir, f"{plot_rendering.slugify(spec['plot']['title'])}.{plot_format}"))
+                 for spec, (data_final, fitted) in zip(CLUSTERING_SPECS, results)]
+        for path in plot_rendering.render_all(tasks, workers):
+            print(f'Plot saved to {path}')
+    else:
+        # Generate a scatter plot for each clustering
+        for spec, (data_final, fitted) in zip(CLUSTERING_SPECS, results):
+            generate_scatter_plot(data_final, cluster_labels=fitted['labels'], **spec['plot'])
 
 # Check if the script is being run directly
 if __name__ == "__main__":  # This condition is used to prevent code from running when the module is imported
-    main()  # Call the main function to execute the script
+    parser = argparse.ArgumentParser(description='Cluster the daily climate data and save final_data_with_clusters.csv')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for the clustering jobs (default: one per job, up to the CPU count)')
+    parser.add_argument('--plot-dir', default=None, help='Render the plots to this directory instead of showing them (for unattended runs)')
+    parser.add_argument('--plot-format', default='png', choices=['png', 'svg'], help='File format of the rendered plots')
+    args = parser.parse_args()
+    with instrumentation.profile_run('generate_plots'):  # cProfile dump when CLIMATE_PROFILE_DIR is set
+        main(args.workers, args.plot_dir, args.plot_format)  # Call the main function to execute the script
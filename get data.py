@@ -20,24 +20,28 @@ TNK: Daily minimum temperature (°C).
 TGK: Minimum ground level temperature (°C).
 eor: End of record.
 """
-import os
-import pandas as pd
+import argparse
+import ingest
 
-# Path to the text file
-txt_file_path = r"C:\Users\denis\Documents\Documents\PROGRAMACIÓN\Machine Learning\"
+# Main function to ingest raw DWD daily files into the partitioned store
+def main():
+    parser = argparse.ArgumentParser(description='Ingest DWD daily climate files (produkt_klima_tag_*.txt or zip archives).')
+    parser.add_argument('inputs', nargs='+', help='Product files, zip archives or directories containing them')
+    parser.add_argument('--store', default=ingest.STORE_DIR, help='Partitioned store (one CSV per station and year)')
+    parser.add_argument('--metadata', default=ingest.METADATA_PATH, help='DWD parameter metadata used to normalise column names')
+    parser.add_argument('--chunk-rows', type=int, default=ingest.CHUNK_ROWS, help='Rows read per chunk')
+    parser.add_argument('--incremental', action='store_true', help='Only ingest days after each station\'s last ingested MESS_DATUM')
+    parser.add_argument('--csv', default='fulldata.csv', help='Also export the store as a single CSV for the clustering script ("" to skip)')
+    args = parser.parse_args()
 
-# Read the text file
-df = pd.read_csv(txt_file_path, delimiter=';')
+    # Stream every file into the store, one chunk at a time
+    rows = ingest.ingest_paths(args.inputs, args.store, args.metadata, args.chunk_rows, args.incremental)
+    print(f"Ingested {rows} rows into {args.store}")
 
-# Full path of the CSV file, including the file name
-csv_file_path = r'C:\Users\denis\Documents\Documents\PROGRAMACIÓN\Machine Learning\fulldata.csv'
+    if args.csv:
+        # Export the store in the fulldata.csv layout
+        rows = ingest.export_csv(args.csv, args.store)
+        print(f"CSV file saved successfully at {args.csv} ({rows} rows)")
 
-# Check if the directory exists, and if not, create it
-directory = os.path.dirname(csv_file_path)
-if not os.path.exists(directory):
-    os.makedirs(directory)
-
-# Save the DataFrame as a CSV file
-df.to_csv(csv_file_path, index=False)
-
-print(f"CSV file saved successfully at {csv_file_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
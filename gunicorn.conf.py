@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for serving the dashboards (see wsgi.py):
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Every setting can be overridden from the environment, e.g.
+    GUNICORN_WORKERS=8 GUNICORN_BIND=0.0.0.0:8050 gunicorn -c gunicorn.conf.py wsgi:server
+
+The dashboards with the prediction API (see asgi.py) need uvicorn workers:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8050')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Threads per worker let concurrent callbacks share one worker's prediction batcher
+# (uvicorn workers ignore threads: the API is async and the dashboard runs in their thread pool)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app (and load the model) once in the master; workers share it copy-on-write after fork
+preload_app = True
+
+timeout = 30
+keepalive = 5
+max_requests = 10000  # Recycle workers periodically to bound memory growth
+max_requests_jitter = 1000
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
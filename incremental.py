@@ -0,0 +1,85 @@
+"""
+Incremental daily update of the clustered dataset.
+
+Only days after each station's high-water mark are ingested. The new rows
+are cleaned like fulldata.csv, assigned to clusters with the KMeans models
+already fitted by the clustering script (predict, no refit) and appended to
+final_data_with_clusters.csv, so an update costs O(new rows). Once
+lag_features.py has built the lag features, those of the new rows are
+appended as well.
+
+Run after a full clustering run has written kmeans_models.pkl:
+    python incremental.py produkt_klima_tag_*.zip
+"""
+import argparse
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import generate_plots as clustering
+import ingest
+import lag_features
+import schema
+
+FINAL_DATA_PATH = 'final_data_with_clusters.csv'
+
+
+# Function to assign clusters and labels to cleaned rows (the cluster ranges stay in the cluster index)
+def assign_clusters(df, fitted_models):
+    columns = {}
+    for fitted in fitted_models:
+        suffix = fitted['suffix']
+        n_clusters = fitted['kmeans'].n_clusters
+        # Only rows with every clustering variable can be assigned; the others are left empty (code -1)
+        valid = df[fitted['variables']].notna().all(axis=1).to_numpy()
+        ids = np.full(len(df), -1)
+        if valid.any():
+            ids[valid] = fitted['kmeans'].predict(df.loc[valid, fitted['variables']])
+        columns[f'Cluster{suffix}'] = schema.convert_column(f'Cluster{suffix}', pd.Series(np.where(valid, ids, np.nan)))
+        columns[f'Cluster Label{suffix}'] = pd.Categorical.from_codes(ids, [fitted['labels'][c] for c in range(n_clusters)])
+    return pd.concat([df.reset_index(drop=True), pd.DataFrame(columns)], axis=1)
+
+
+# Function to append clustered rows to the final CSV in its existing column order
+def append_final_data(rows, final_path=FINAL_DATA_PATH):
+    header = pd.read_csv(final_path, nrows=0).columns
+    missing = set(header) - set(rows.columns)
+    if missing:
+        raise ValueError(f'New rows lack columns of {final_path}: {sorted(missing)}')
+    rows[list(header)].to_csv(final_path, mode='a', header=False, index=False)
+    return len(rows)
+
+
+# Function to ingest only new days and append their clustered rows to the final CSV
+def update(paths, store=ingest.STORE_DIR, final_path=FINAL_DATA_PATH, models_path=clustering.MODELS_PATH,
+           metadata_path=ingest.METADATA_PATH, chunk_rows=ingest.CHUNK_ROWS):
+    fitted_models = joblib.load(models_path)
+    ingested = appended = 0
+    for chunk in ingest.iter_ingested_chunks(paths, store, metadata_path, chunk_rows, incremental=True):
+        ingested += len(chunk)
+        cleaned = clustering.clean_data(ingest.to_fulldata_layout(chunk))  # Same cleaning as a full run
+        if not cleaned.empty:
+            clustered = assign_clusters(cleaned, fitted_models)
+            appended += append_final_data(clustered, final_path)
+            if os.path.exists(lag_features.TAIL_PATH):  # Keep the lag features in step once they have been built
+                lag_features.update_features(clustered)
+    return ingested, appended
+
+
+# Main function to run an incremental update from the command line
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='Product files, zip archives or directories containing them')
+    parser.add_argument('--store', default=ingest.STORE_DIR, help='Partitioned store holding the high-water marks')
+    parser.add_argument('--final-data', default=FINAL_DATA_PATH, help='Clustered CSV to append to')
+    parser.add_argument('--models', default=clustering.MODELS_PATH, help='Fitted KMeans models from the clustering script')
+    args = parser.parse_args()
+
+    ingested, appended = update(args.inputs, args.store, args.final_data, args.models)
+    print(f'Ingested {ingested} new rows; appended {appended} clustered rows to {args.final_data}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Streaming ingestion of DWD daily climate files (produkt_klima_tag_*.txt).
+
+Raw files, zipped DWD archives or whole directories of them are read in
+fixed-size chunks, the column names are normalised to the parameter codes
+listed in the station metadata, the -999 sentinel becomes NaN while
+parsing, and every chunk is merged into a store partitioned by station and
+year:
+
+    <store>/STATIONS_ID=03379/year=1985.csv
+
+A partition holds each (STATIONS_ID, MESS_DATUM) once: rows of a chunk
+replace the rows of the same days already stored, so ingesting the same
+files again, or re-ingesting a chunk whose watermark was not saved before a
+crash, adds no duplicates. Only one chunk (and the partitions it touches)
+is held in memory at a time, so memory use does not grow with the number of
+stations or years ingested.
+"""
+import contextlib
+import glob
+import io
+import json
+import os
+import zipfile
+
+import pandas as pd
+
+STORE_DIR = 'station_store'
+METADATA_PATH = 'Metadaten_Parameter_klima_tag_03379.txt'
+CHUNK_ROWS = 50000
+MISSING_VALUE = -999
+PRODUCT_PATTERN = 'produkt_klima_tag'
+ENCODING = 'latin-1'  # DWD text files are not UTF-8
+WATERMARK_FILE = '_watermarks.json'  # Last ingested MESS_DATUM per station
+
+# Columns present in every product file besides the measured parameters
+KEY_COLUMNS = ['STATIONS_ID', 'MESS_DATUM']
+QUALITY_COLUMNS = ['QN_3', 'QN_4']
+DROPPED_COLUMNS = ['EOR']  # End-of-record marker, constant on every row
+
+
+# Function to read parameter codes, descriptions and units from the DWD metadata file
+def load_parameters(metadata_path=METADATA_PATH):
+    parameters = {}
+    with open(metadata_path, encoding=ENCODING) as f:
+        header = f.readline().strip().split(';')
+        name_col, description_col, unit_col = (header.index(c) for c in ('Parameter', 'Parameterbeschreibung', 'Einheit'))
+        for line in f:
+            fields = line.strip().split(';')
+            if len(fields) <= unit_col:  # Legend and footer lines
+                continue
+            parameters[fields[name_col].strip().upper()] = {
+                'description': fields[description_col].strip(),
+                'unit': fields[unit_col].strip()
+            }
+    return parameters
+
+
+# Function to map raw header names ('  FX', 'eor') to normalised parameter codes
+def normalise_columns(columns, parameters):
+    known = set(parameters) | set(KEY_COLUMNS) | set(QUALITY_COLUMNS) | set(DROPPED_COLUMNS)
+    mapping = {}
+    for column in columns:
+        name = column.strip().upper()
+        if name not in known:
+            raise ValueError(f'Unknown DWD column {column!r}; not listed in the parameter metadata')
+        mapping[column] = name
+    return mapping
+
+
+# Function to list the product files to ingest from files, zip archives and directories
+def iter_sources(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            children = sorted(glob.glob(os.path.join(path, '*.zip')) + glob.glob(os.path.join(path, f'{PRODUCT_PATTERN}*.txt')))
+            yield from iter_sources(children)
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                members = [m for m in archive.namelist() if os.path.basename(m).startswith(PRODUCT_PATTERN)]
+            for member in members:
+                yield path, member
+        else:
+            yield path, None
+
+
+# Function to open a product file, either on disk or inside a zip archive
+@contextlib.contextmanager
+def open_source(path, member=None):
+    if member is None:
+        with open(path, encoding=ENCODING, newline='') as f:
+            yield f
+    else:
+        with zipfile.ZipFile(path) as archive, archive.open(member) as raw:
+            yield io.TextIOWrapper(raw, encoding=ENCODING, newline='')
+
+
+# Function to read one product file as a stream of cleaned chunks
+def read_chunks(path, member=None, parameters=None, chunk_rows=CHUNK_ROWS):
+    parameters = parameters if parameters is not None else load_parameters()
+    with open_source(path, member) as f:
+        reader = pd.read_csv(f, sep=';', chunksize=chunk_rows, na_values=[str(MISSING_VALUE), f'{MISSING_VALUE}.0'],
+                             skipinitialspace=True, dtype={'STATIONS_ID': 'int32', 'MESS_DATUM': 'int32'})
+        for chunk in reader:
+            chunk = chunk.rename(columns=normalise_columns(chunk.columns, parameters))
+            chunk = chunk.drop(columns=[c for c in DROPPED_COLUMNS if c in chunk.columns])
+            measured = [c for c in chunk.columns if c not in KEY_COLUMNS]
+            chunk[measured] = chunk[measured].astype('float32')  # -999 is already NaN here
+            yield chunk
+
+
+# Function to get the partition file for a station and year
+def partition_path(store, station, year):
+    return os.path.join(store, f'STATIONS_ID={int(station):05d}', f'year={int(year)}.csv')
+
+
+# Function to merge a part into the rows of its partition file, the part's rows replacing stored rows of the same day
+def merge_partition(path, part):
+    if os.path.exists(path):
+        stored = pd.read_csv(path, dtype={'STATIONS_ID': 'int32', 'MESS_DATUM': 'int32'})
+        part = pd.concat([stored, part], ignore_index=True).drop_duplicates(subset=KEY_COLUMNS, keep='last')
+        measured = [c for c in part.columns if c not in KEY_COLUMNS]
+        part[measured] = part[measured].astype('float32')
+    return part.sort_values('MESS_DATUM', kind='stable')
+
+
+# Function to write a chunk into the station/year partitions it covers; idempotent, so a chunk can be written twice
+def append_chunk(chunk, store=STORE_DIR):
+    years = chunk['MESS_DATUM'].to_numpy() // 10000
+    for (station, year), part in chunk.groupby([chunk['STATIONS_ID'].to_numpy(), years], sort=False):
+        path = partition_path(store, station, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Rewritten whole and swapped in, so a crash never leaves a partition half written
+        merge_partition(path, part).to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    return len(chunk)
+
+
+# Function to read the last ingested MESS_DATUM of every station
+def load_watermarks(store=STORE_DIR):
+    try:
+        with open(os.path.join(store, WATERMARK_FILE), encoding='utf-8') as f:
+            return {int(station): int(date) for station, date in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+
+
+# Function to save the per-station high-water marks, replacing the file atomically
+def save_watermarks(marks, store=STORE_DIR):
+    os.makedirs(store, exist_ok=True)
+    path = os.path.join(store, WATERMARK_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({str(station): date for station, date in sorted(marks.items())}, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+# Function to keep only the rows newer than their station's high-water mark
+def filter_new_rows(chunk, marks):
+    last = chunk['STATIONS_ID'].map(marks).fillna(-1).to_numpy()
+    return chunk[chunk['MESS_DATUM'].to_numpy() > last]
+
+
+# Function to advance the high-water marks past the rows of a chunk
+def update_watermarks(chunk, marks):
+    for station, last in chunk.groupby('STATIONS_ID')['MESS_DATUM'].max().items():
+        marks[int(station)] = max(marks.get(int(station), -1), int(last))
+
+
+# Function to ingest sources chunk by chunk, yielding every chunk appended to the store
+def iter_ingested_chunks(paths, store=STORE_DIR, metadata_path=METADATA_PATH, chunk_rows=CHUNK_ROWS, incremental=False):
+    parameters = load_parameters(metadata_path)
+    marks = load_watermarks(store)
+    for path, member in iter_sources(paths):
+        for chunk in read_chunks(path, member, parameters, chunk_rows):
+            if incremental:
+                chunk = filter_new_rows(chunk, marks)  # Skip days already in the store
+                if chunk.empty:
+                    continue
+            append_chunk(chunk, store)
+            yield chunk
+            # Advance the marks only once the caller has processed the chunk
+            update_watermarks(chunk, marks)
+            save_watermarks(marks, store)
+
+
+# Function to ingest product files, zip archives or directories into the partitioned store
+def ingest_paths(paths, store=STORE_DIR, metadata_path=METADATA_PATH, chunk_rows=CHUNK_ROWS, incremental=False):
+    return sum(len(chunk) for chunk in iter_ingested_chunks(paths, store, metadata_path, chunk_rows, incremental))
+
+
+# Function to list the partition files of the store, optionally for some stations only
+def partition_files(store=STORE_DIR, stations=None):
+    if stations is None:
+        return sorted(glob.glob(os.path.join(store, 'STATIONS_ID=*', 'year=*.csv')))
+    # Only the wanted station directories are listed, so per-station reads stay cheap in a large store
+    return sorted(f for s in set(stations) for f in glob.glob(os.path.join(store, f'STATIONS_ID={int(s):05d}', 'year=*.csv')))
+
+
+# Function to list the stations in the store
+def list_stations(store=STORE_DIR):
+    directories = glob.glob(os.path.join(store, 'STATIONS_ID=*'))
+    return sorted(int(os.path.basename(d).split('=', 1)[1]) for d in directories if os.path.isdir(d))
+
+
+# Function to stream the store back partition by partition
+def read_store(store=STORE_DIR, stations=None, columns=None):
+    for path in partition_files(store, stations):
+        yield pd.read_csv(path, usecols=columns)
+
+
+# Function to add back the end-of-record column expected in the fulldata.csv layout
+def to_fulldata_layout(part):
+    part = part.copy()
+    part['eor'] = 'eor'
+    return part
+
+
+# Function to list the columns of every partition, in order of first appearance (headers only are read)
+def store_columns(store=STORE_DIR, stations=None):
+    columns = {}
+    for path in partition_files(store, stations):
+        columns.update(dict.fromkeys(pd.read_csv(path, nrows=0).columns))
+    return list(columns)
+
+
+# Function to export the store as a fulldata.csv-style file (-999 for missing values, trailing eor column)
+def export_csv(csv_path, store=STORE_DIR, stations=None):
+    directory = os.path.dirname(csv_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    columns = store_columns(store, stations)  # Union over all partitions: parameters may start in later years
+    rows = 0
+    header = True
+    for part in read_store(store, stations):
+        part = to_fulldata_layout(part.reindex(columns=columns))  # Parameters a partition lacks are written as missing
+        part.to_csv(csv_path, mode='w' if header else 'a', header=header, index=False, na_rep=str(MISSING_VALUE))
+        rows += len(part)
+        header = False
+    return rows
@@ -0,0 +1,195 @@
+"""
+Lightweight timing and memory instrumentation for the pipeline and the dashboards.
+
+Stages are wrapped with the timed decorator or the stage context manager.
+Each run of a stage records its wall time, the rows it handled and the
+change in resident memory. Those records:
+  - add to in-process metrics, which the dashboards serve in the Prometheus
+    text format at /metrics (see register_metrics_endpoint);
+  - are appended as one JSON line per run to the file named by
+    CLIMATE_METRICS_LOG, when it is set.
+Under gunicorn every worker keeps its own metrics and writes its pid into
+the log lines. Memory deltas are process-wide, so concurrent callbacks in
+one worker share them; treat them as indicative.
+
+Profiling is opt-in: with CLIMATE_PROFILE_DIR set, the clustering and
+training scripts run under cProfile and dump <script>-<time>-<pid>.prof
+(pstats format, readable with `python -m pstats` or snakeviz) into it.
+Worker processes are not included; run the clustering with --workers 1 to
+profile the jobs themselves. A running dashboard is best profiled from the
+outside with a sampling profiler, which needs no support in the code:
+    py-spy record -o profile.svg --pid <worker pid>
+"""
+import bisect
+import contextlib
+import cProfile
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_LOG = os.environ.get('CLIMATE_METRICS_LOG')
+PROFILE_DIR = os.environ.get('CLIMATE_PROFILE_DIR')
+METRICS_PATH = '/metrics'
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60, 300)  # Upper bounds (seconds) of the duration histogram
+
+logger = logging.getLogger('climate.metrics')
+
+
+# Function to read the current resident set size in bytes (None where /proc is not available)
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+# Function to read the peak resident set size of the process so far in bytes (None without getrusage)
+def process_peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Bytes on macOS, kilobytes elsewhere
+
+
+# Function to send the stage records to a JSON-lines file
+def configure_log(path):
+    handler = logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+# Running totals of every instrumented stage in this process
+class StageMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    # Add one run of a stage
+    def observe(self, name, seconds, rows=None, rss_delta=None):
+        with self._lock:
+            entry = self._stages.get(name)
+            if entry is None:
+                entry = self._stages[name] = {'count': 0, 'seconds': 0.0, 'rows': 0, 'rss_delta': None,
+                                              'buckets': [0] * (len(BUCKETS) + 1)}
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['buckets'][bisect.bisect_left(BUCKETS, seconds)] += 1
+            if rows is not None:
+                entry['rows'] += rows
+            if rss_delta is not None:
+                entry['rss_delta'] = rss_delta  # Last run
+
+    # Copy of the totals, safe to read while other threads record
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(entry, buckets=list(entry['buckets'])) for name, entry in self._stages.items()}
+
+    # Render the totals in the Prometheus text exposition format
+    def render(self):
+        stages = sorted(self.snapshot().items())
+        lines = ['# HELP climate_stage_seconds Wall time of instrumented stages.', '# TYPE climate_stage_seconds histogram']
+        for name, entry in stages:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, entry['buckets']):
+                cumulative += count
+                lines.append(f'climate_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'climate_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {entry["count"]}')
+            lines.append(f'climate_stage_seconds_sum{{stage="{name}"}} {entry["seconds"]:.6f}')
+            lines.append(f'climate_stage_seconds_count{{stage="{name}"}} {entry["count"]}')
+        lines += ['# HELP climate_stage_rows_total Rows handled by instrumented stages.', '# TYPE climate_stage_rows_total counter']
+        lines += [f'climate_stage_rows_total{{stage="{name}"}} {entry["rows"]}' for name, entry in stages]
+        lines += ['# HELP climate_stage_rss_delta_bytes Change in resident memory during the last run of a stage.',
+                  '# TYPE climate_stage_rss_delta_bytes gauge']
+        lines += [f'climate_stage_rss_delta_bytes{{stage="{name}"}} {entry["rss_delta"]}' for name, entry in stages
+                  if entry['rss_delta'] is not None]
+        rss = current_rss()
+        if rss is not None:
+            lines += ['# HELP process_resident_memory_bytes Resident memory size in bytes.', '# TYPE process_resident_memory_bytes gauge',
+                      f'process_resident_memory_bytes {rss}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = StageMetrics()
+if METRICS_LOG:
+    configure_log(METRICS_LOG)
+
+
+# Function to time a block and record its rows and memory delta; the block may set record['rows']
+@contextlib.contextmanager
+def stage(name, rows=None, memory=True):
+    record = {'stage': name, 'rows': rows}
+    rss_before = current_rss() if memory else None
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record['failed'] = True
+        raise
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        rss_after = current_rss() if rss_before is not None else None
+        record['rss_delta_bytes'] = rss_after - rss_before if rss_after is not None else None
+        metrics.observe(name, record['seconds'], record['rows'], record['rss_delta_bytes'])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(dict(record, pid=os.getpid(), time=round(time.time(), 3))))
+
+
+# Function to count the rows of a stage's result: a DataFrame or array, or the first item of a returned tuple
+def count_rows(result):
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    return len(result) if hasattr(result, 'shape') else None
+
+
+# Decorator to record every call of a function as a stage
+def timed(name, rows=count_rows, memory=True):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, memory=memory) as record:
+                result = func(*args, **kwargs)
+                record['rows'] = rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+# Function to run a block under cProfile and dump the profile, when a profile directory is set
+@contextlib.contextmanager
+def profile_run(name, directory=None):
+    directory = directory or PROFILE_DIR
+    if not directory:
+        yield None
+        return
+    os.makedirs(directory, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+        print(f'Profile saved to {path}', file=sys.stderr)
+
+
+# Function to serve the metrics in the Prometheus text format on a Flask server (the dashboards' app.server)
+def register_metrics_endpoint(server, path=METRICS_PATH):
+    def metrics_endpoint():
+        return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    server.add_url_rule(path, 'metrics', metrics_endpoint)
+    return server
@@ -0,0 +1,147 @@
+"""
+Lag and rolling-window features for next-day temperature forecasting.
+
+For every station in final_data_with_clusters.csv the daily series is laid
+out on a full calendar (missing days become NaN, so lags and windows count
+days, not rows) and, per variable, the engine adds:
+    '<variable> lag<k>'    value k days earlier
+    '<variable> mean<w>'   rolling mean over the last w days (also min<w>, max<w>)
+    '<variable> ewm<s>'    exponentially weighted mean with span s
+All features of day t only use days up to t; next_day_target gives the
+matching target (the temperature of day t+1). Everything runs through
+pandas' grouped shift/rolling/ewm kernels, with no per-row Python.
+
+The last HORIZON days of every station are kept in a tail file. New days
+are featurized from that tail alone (the EWMAs continue from their saved
+state), so an update costs O(new rows):
+    python lag_features.py                       # full build
+    python lag_features.py --update new_days.csv # append features of new rows
+incremental.py calls the update automatically once a full build exists.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import feature_registry
+
+FINAL_DATA_PATH = 'final_data_with_clusters.csv'
+FEATURES_PATH = 'lag_features.csv'
+TAIL_PATH = 'lag_features_tail.csv'
+KEYS = ['STATIONS_ID', 'Date']
+VARIABLES = feature_registry.MEASUREMENT_FEATURES + [feature_registry.TARGET]  # Every daily measurement (not Month)
+LAGS = (1, 2, 3, 7)
+WINDOWS = (3, 7, 30)
+EWMA_SPANS = (7, 30)
+HORIZON = max(max(LAGS), max(WINDOWS))  # Days of history needed to featurize a new day
+
+
+# Function to reindex rows onto one row per station and calendar day, returning the frame and the observed-row mask
+def calendar_frame(df, variables):
+    df = df.drop_duplicates(KEYS, keep='last').sort_values(KEYS)
+    spans = df.groupby('STATIONS_ID', sort=True)['Date'].agg(['min', 'max'])
+    lengths = ((spans['max'] - spans['min']).dt.days + 1).to_numpy()
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)  # Day number within each station
+    dates = np.repeat(spans['min'].to_numpy(), lengths) + offsets.astype('timedelta64[D]')
+    calendar = pd.MultiIndex.from_arrays([np.repeat(spans.index.to_numpy(), lengths), dates], names=KEYS)
+    observed = df.set_index(KEYS)
+    frame = observed[variables].astype(np.float64).reindex(calendar)
+    return frame, calendar.isin(observed.index)
+
+
+# Function to compute the lag, rolling and EWMA features of daily rows.
+# seed: tail rows from a previous run; for the stations it covers, only rows after the tail are returned,
+# with the EWMAs continued from the tail. Stations without a tail start from scratch.
+def compute_features(df, variables=VARIABLES, lags=LAGS, windows=WINDOWS, spans=EWMA_SPANS, seed=None):
+    if seed is not None:
+        df = pd.concat([seed[KEYS + variables], df[KEYS + variables]], ignore_index=True)
+    frame, observed = calendar_frame(df, variables)
+    grouped = frame.groupby(level='STATIONS_ID', sort=False)
+    columns = {name: frame[name].to_numpy(dtype=np.float32) for name in variables}  # float32 keeps wide feature sets compact
+
+    for k in lags:
+        shifted = grouped.shift(k)
+        columns.update({f'{name} lag{k}': shifted[name].to_numpy(dtype=np.float32) for name in variables})
+    for w in windows:
+        rolling = grouped.rolling(w, min_periods=max(1, w // 2))  # Rows stay in frame order: stations are sorted and contiguous
+        for stat in ('mean', 'min', 'max'):
+            values = getattr(rolling, stat)()
+            columns.update({f'{name} {stat}{w}': values[name].to_numpy(dtype=np.float32) for name in variables})
+
+    if seed is not None:
+        # Start every EWMA at the station's last tail row, set to its saved EWMA value (adjust=False makes this exact)
+        last = seed.groupby('STATIONS_ID')['Date'].max()
+        dates = frame.index.get_level_values('Date')
+        seed_dates = frame.index.get_level_values('STATIONS_ID').map(last)
+        before, at_seed = dates < seed_dates, dates == seed_dates
+        seed_rows = seed.set_index(KEYS).reindex(frame.index[at_seed])
+    for s in spans:
+        ewm_input = frame
+        if seed is not None:
+            ewm_input = frame.copy()
+            ewm_input[before] = np.nan
+            ewm_input.loc[at_seed, variables] = seed_rows[[f'{name} ewm{s}' for name in variables]].to_numpy()
+        ewm = ewm_input.groupby(level='STATIONS_ID', sort=False).ewm(span=s, adjust=False).mean()
+        columns.update({f'{name} ewm{s}': ewm[name].to_numpy(dtype=np.float32) for name in variables})
+
+    keep = observed if seed is None else observed & ~before & ~at_seed
+    features = pd.DataFrame(columns, index=frame.index)[keep].reset_index()
+    return features
+
+
+# Function to get the temperature of the next calendar day for each feature row (NaN when that day is missing)
+def next_day_target(features, target=feature_registry.TARGET):
+    ordered = features.sort_values(KEYS)
+    grouped = ordered.groupby('STATIONS_ID', sort=False)
+    is_next_day = grouped['Date'].shift(-1) - ordered['Date'] == pd.Timedelta(days=1)
+    return grouped[target].shift(-1).where(is_next_day).reindex(features.index)
+
+
+# Function to keep the last HORIZON days of each station, the history an update needs
+def feature_tail(features, horizon=HORIZON):
+    last = features.groupby('STATIONS_ID')['Date'].transform('max')
+    return features[features['Date'] > last - pd.Timedelta(days=horizon)]
+
+
+def read_daily(path):
+    return pd.read_csv(path, parse_dates=['Date'])
+
+
+# Function to build the features of the whole clustered dataset
+def build(final_path=FINAL_DATA_PATH, features_path=FEATURES_PATH, tail_path=TAIL_PATH):
+    features = compute_features(read_daily(final_path))
+    features.to_csv(features_path, index=False)
+    feature_tail(features).to_csv(tail_path, index=False)
+    return len(features)
+
+
+# Function to featurize new daily rows from the saved tail and append them
+def update_features(rows, features_path=FEATURES_PATH, tail_path=TAIL_PATH):
+    tail = read_daily(tail_path)
+    features = compute_features(rows, seed=tail)
+    if features.empty:
+        return 0
+    header = pd.read_csv(features_path, nrows=0).columns
+    features[list(header)].to_csv(features_path, mode='a', header=False, index=False)
+    feature_tail(pd.concat([tail, features], ignore_index=True)).to_csv(tail_path, index=False)
+    return len(features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=FINAL_DATA_PATH, help='Clustered daily data for a full build')
+    parser.add_argument('--update', nargs='+', default=None, help='CSV files of new daily rows to featurize and append')
+    parser.add_argument('--output', default=FEATURES_PATH, help='Feature CSV')
+    parser.add_argument('--tail', default=TAIL_PATH, help='Per-station history kept for updates')
+    args = parser.parse_args()
+
+    if args.update:
+        rows = sum(update_features(read_daily(path), args.output, args.tail) for path in args.update)
+        print(f'Appended features of {rows} new rows to {args.output}')
+    else:
+        rows = build(args.data, args.output, args.tail)
+        print(f'Built features of {rows} rows into {args.output}')
+
+
+if __name__ == '__main__':
+    main()
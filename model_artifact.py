@@ -0,0 +1,73 @@
+"""
+Compact artifact for the linear temperature model.
+
+The artifact is a small JSON file with the coefficients, intercept and
+feature order of the regression, plus the cluster index learned by the
+clustering script (see cluster_index.py). Loading it needs neither sklearn nor joblib, so the
+dashboards start quickly. Linear Regression.py writes it next to the
+pickled model; the dashboards never write it, so convert an existing
+pickle once with:
+    python model_artifact.py
+"""
+import json
+import os
+
+import cluster_index
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_PATH = os.path.join(BASE_DIR, 'linear_regression_model.json')
+PICKLE_PATH = os.path.join(BASE_DIR, 'linear_regression_model_with_clusters.pkl')
+FEATURES_PATH = os.path.join(BASE_DIR, 'features.pkl')  # Feature order of models fitted without feature names
+FORMAT_VERSION = 1
+
+
+# Function to describe a linear model given by its coefficients as a plain dictionary
+def artifact_from_coefficients(coef, intercept, features, model_name='LinearRegression', cluster_ranges=None):
+    return {
+        'format_version': FORMAT_VERSION,
+        'model': model_name,
+        'features': list(features),
+        'coef': [float(c) for c in coef],
+        'intercept': float(intercept),
+        'cluster_ranges': cluster_ranges or {}
+    }
+
+
+# Function to describe a fitted sklearn linear model as a plain dictionary
+def artifact_from_model(model, features=None, cluster_ranges=None):
+    features = features if features is not None else model.feature_names_in_
+    return artifact_from_coefficients(model.coef_, model.intercept_, features, type(model).__name__, cluster_ranges)
+
+
+# Function to write an artifact, replacing the file atomically
+def save_artifact(artifact, path=ARTIFACT_PATH):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# Function to read an artifact
+def load_artifact(path=ARTIFACT_PATH):
+    with open(path, encoding='utf-8') as f:
+        artifact = json.load(f)
+    if artifact.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f'Unsupported model artifact version in {path}: {artifact.get("format_version")}')
+    return artifact
+
+
+# Main function to convert the pickled model into the compact artifact
+def main():
+    import joblib
+    import pickle
+    model = joblib.load(PICKLE_PATH)
+    features = getattr(model, 'feature_names_in_', None)
+    if features is None:  # Models fitted on plain arrays carry no names; use the saved feature list
+        with open(FEATURES_PATH, 'rb') as f:
+            features = pickle.load(f)
+    path = save_artifact(artifact_from_model(model, features, cluster_index.load_index()))
+    print(f'Model artifact saved to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+On-disk registry of per-station models, indexed by station and version.
+
+    model_registry/
+        index.json                                 latest version and metadata of every station's versions
+        STATIONS_ID=03379/v0002/model.json         compact artifact (see model_artifact.py), with the
+                                                   station's cluster index as its cluster ranges
+        STATIONS_ID=03379/v0002/kmeans_models.pkl  fitted clusterings, to assign clusters to new days
+
+Publishing never overwrites a version: the new version directory is
+written completely before index.json is replaced to point at it, so a
+reader always sees a whole model. Only one process publishes at a time
+(station_training.py publishes from its parent process); the dashboards
+read the registry lazily through prediction_service.StationModels.
+
+The registry directory can be moved with CLIMATE_MODEL_REGISTRY. List it with:
+    python model_registry.py
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+
+import model_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.environ.get('CLIMATE_MODEL_REGISTRY', os.path.join(BASE_DIR, 'model_registry'))
+INDEX_FILE = 'index.json'
+MODEL_FILE = 'model.json'
+CLUSTERINGS_FILE = 'kmeans_models.pkl'
+
+_index_cache = {}  # Index path -> (mtime_ns, index), so readers parse index.json only when it changes
+
+
+# Function to format a station id like the store and registry directories
+def station_key(station):
+    return f'{int(station):05d}'
+
+
+# Function to get the directory of one version of a station's model
+def version_dir(station, version, registry=REGISTRY_DIR):
+    return os.path.join(registry, f'STATIONS_ID={station_key(station)}', f'v{int(version):04d}')
+
+
+# Function to read the registry index; empty if nothing has been published
+def load_index(registry=REGISTRY_DIR):
+    path = os.path.join(registry, INDEX_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _index_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, encoding='utf-8') as f:
+        index = json.load(f)
+    _index_cache[path] = (mtime, index)
+    return index
+
+
+# Function to write the registry index, replacing the file atomically
+def save_index(index, registry=REGISTRY_DIR):
+    os.makedirs(registry, exist_ok=True)
+    path = os.path.join(registry, INDEX_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# Function to list the stations with a published model
+def stations(registry=REGISTRY_DIR):
+    return sorted(int(key) for key in load_index(registry))
+
+
+# Function to get the latest version of a station's model (None if it has none)
+def latest_version(station, registry=REGISTRY_DIR):
+    entry = load_index(registry).get(station_key(station))
+    return entry['latest'] if entry else None
+
+
+# Function to publish a station's model as a new version and return the version number
+def publish(station, artifact, fitted_models=None, metadata=None, registry=REGISTRY_DIR):
+    index = json.loads(json.dumps(load_index(registry)))  # Copy: the loaded index is shared with other readers
+    entry = index.setdefault(station_key(station), {'latest': None, 'versions': {}})
+    version = max(map(int, entry['versions']), default=0) + 1
+    directory = version_dir(station, version, registry)
+    shutil.rmtree(directory + '.tmp', ignore_errors=True)
+    os.makedirs(directory + '.tmp')
+    model_artifact.save_artifact(artifact, os.path.join(directory + '.tmp', MODEL_FILE))
+    if fitted_models is not None:
+        import joblib
+        joblib.dump(fitted_models, os.path.join(directory + '.tmp', CLUSTERINGS_FILE))
+    os.replace(directory + '.tmp', directory)
+
+    created = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+    entry['versions'][str(version)] = dict(metadata or {}, created=created)
+    entry['latest'] = version
+    save_index(index, registry)
+    return version
+
+
+# Function to resolve a version (the latest when None), failing if the station has no model
+def _resolve(station, version, registry):
+    version = version if version is not None else latest_version(station, registry)
+    if version is None:
+        raise KeyError(f'No model in the registry for station {station_key(station)}')
+    return version
+
+
+# Function to read the artifact of a station's model (the latest version by default)
+def load_artifact(station, version=None, registry=REGISTRY_DIR):
+    directory = version_dir(station, _resolve(station, version, registry), registry)
+    return model_artifact.load_artifact(os.path.join(directory, MODEL_FILE))
+
+
+# Function to read the fitted clusterings of a station's model (the latest version by default)
+def load_clusterings(station, version=None, registry=REGISTRY_DIR):
+    import joblib
+    directory = version_dir(station, _resolve(station, version, registry), registry)
+    return joblib.load(os.path.join(directory, CLUSTERINGS_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registry', default=REGISTRY_DIR, help='Registry directory')
+    args = parser.parse_args()
+
+    index = load_index(args.registry)
+    for key, entry in sorted(index.items()):
+        latest = entry['versions'][str(entry['latest'])]
+        print(f"{key}  v{entry['latest']:<4d} {len(entry['versions'])} versions  rows {latest.get('rows')}  "
+              f"MSE {latest.get('mse', float('nan')):.3f}  R² {latest.get('r2', float('nan')):.3f}  {latest['created']}")
+    print(f'{len(index)} stations in {args.registry}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Model-family sweep for the temperature model.
+
+Evaluates linear regression, ridge, tree ensembles and a small MLP on
+time-series cross-validation folds: the rows are ordered by date and every
+fold trains on the past and tests on the following block, so no model sees
+the future. Candidate/fold pairs run in a process pool. The feature matrix
+and target are written once to .cache/sweep as .npy files, and the workers
+memory-map them instead of receiving a pickled copy per task.
+
+The leaderboard (mean MSE/MAE/R² and fit/predict times per candidate) is
+written to sweep_leaderboard.csv. The winner is refitted on all rows and
+saved next to it, never over the production model: linear winners as a
+JSON artifact (sweep_best_model.json), the others as a pickle
+(sweep_best_model.pkl). --promote replaces the dashboards' model
+(linear_regression_model.json) with a linear winner. The dashboards load
+a non-linear model only when it is named explicitly, so a non-linear
+winner is not promoted; serve it with
+CLIMATE_MODEL_PATH=sweep_best_model.pkl.
+
+Run:
+    python model_sweep.py --folds 5 --workers 8
+    python model_sweep.py --families linear ridge --promote
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+import cluster_index
+import data_cache
+import feature_registry
+import model_artifact
+import schema
+import streaming_regression
+
+FINAL_DATA_PATH = 'final_data_with_clusters.csv'
+SWEEP_DIR = os.path.join(data_cache.CACHE_DIR, 'sweep')
+LEADERBOARD_PATH = 'sweep_leaderboard.csv'
+BEST_MODEL_PATH = 'sweep_best_model.pkl'
+BEST_ARTIFACT_PATH = 'sweep_best_model.json'
+RANDOM_STATE = 42
+
+# Candidates of the sweep: model family and constructor parameters
+CANDIDATES = [
+    {'name': 'linear', 'family': 'linear', 'params': {}},
+    *[{'name': f'ridge_alpha_{alpha:g}', 'family': 'ridge', 'params': {'alpha': alpha}} for alpha in (0.1, 1.0, 10.0, 100.0)],
+    *[{'name': f'random_forest_depth_{depth}', 'family': 'random_forest', 'params': {'n_estimators': 100, 'max_depth': depth}}
+      for depth in (8, 16)],
+    *[{'name': f'gradient_boosting_lr_{rate:g}', 'family': 'gradient_boosting', 'params': {'max_iter': 200, 'learning_rate': rate}}
+      for rate in (0.05, 0.1)],
+    *[{'name': f'mlp_{"x".join(map(str, layers))}', 'family': 'mlp', 'params': {'hidden_layer_sizes': layers}}
+      for layers in ((32,), (64, 32))]
+]
+
+
+# Function to build an unfitted model for a candidate (sklearn is imported in the workers only)
+def make_model(candidate):
+    params = candidate['params']
+    if candidate['family'] == 'linear':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression(**params)
+    if candidate['family'] == 'ridge':
+        from sklearn.linear_model import Ridge
+        return Ridge(**params)
+    if candidate['family'] == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1, **params)
+    if candidate['family'] == 'gradient_boosting':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(random_state=RANDOM_STATE, **params)
+    if candidate['family'] == 'mlp':
+        from sklearn.neural_network import MLPRegressor
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), MLPRegressor(max_iter=300, early_stopping=True, random_state=RANDOM_STATE, **params))
+    raise ValueError(f"Unknown model family: {candidate['family']}")
+
+
+# Function to parse the clustered CSV into the cleaned training rows, ordered by date
+def parse_training_data(file_path):
+    df = streaming_regression.clean_chunk(pd.read_csv(file_path, usecols=schema.keep_column))  # Same cleaning as Linear Regression.py
+    return df.sort_values('Date', kind='stable').reset_index(drop=True)
+
+
+# Function to write the feature matrix and target once for the workers to memory-map
+def write_fold_data(df, features, target, directory=SWEEP_DIR):
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'X.npy'), df[features].to_numpy(dtype=np.float64))
+    np.save(os.path.join(directory, 'y.npy'), df[target].to_numpy(dtype=np.float64))
+    return directory
+
+
+# Function to split n time-ordered rows into expanding-window folds: [(train_end, test_end), ...]
+def time_series_folds(n_rows, n_folds):
+    test_size = n_rows // (n_folds + 1)
+    return [(test_size * (k + 1), test_size * (k + 2) if k < n_folds - 1 else n_rows) for k in range(n_folds)]
+
+
+# Per-process state of the sweep workers, set once by _init_worker
+_fold_data = None
+_thread_limits = None
+
+
+# Function to prepare a sweep worker: memory-map the fold data once
+def _init_worker(directory):
+    global _fold_data, _thread_limits
+    _fold_data = (np.load(os.path.join(directory, 'X.npy'), mmap_mode='r'), np.load(os.path.join(directory, 'y.npy'), mmap_mode='r'))
+    _thread_limits = threadpool_limits(limits=1)  # One BLAS/OpenMP thread per worker; the pool provides the parallelism
+
+
+# Function to fit and score one candidate on one fold inside a worker
+def _evaluate(candidate, fold):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    X, y = _fold_data
+    train_end, test_end = fold
+    model = make_model(candidate)
+    start = time.perf_counter()
+    model.fit(X[:train_end], y[:train_end])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X[train_end:test_end])
+    predict_seconds = time.perf_counter() - start
+    y_test = y[train_end:test_end]
+    return {
+        'name': candidate['name'],
+        'family': candidate['family'],
+        'mse': mean_squared_error(y_test, y_pred),
+        'mae': mean_absolute_error(y_test, y_pred),
+        'r2': r2_score(y_test, y_pred),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds
+    }
+
+
+# Function to evaluate every candidate on every fold and return the leaderboard, best first
+def run_sweep(directory, n_rows, candidates=CANDIDATES, n_folds=5, workers=None):
+    folds = time_series_folds(n_rows, n_folds)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory,)) as pool:
+        futures = [pool.submit(_evaluate, candidate, fold) for candidate in candidates for fold in folds]
+        scores = pd.DataFrame([future.result() for future in futures])
+    leaderboard = scores.groupby(['name', 'family'], sort=False).mean().reset_index()
+    return leaderboard.sort_values('mse', kind='stable').reset_index(drop=True)
+
+
+# Function to refit the winner on all rows and save it; promote=True replaces the dashboards' linear model with it
+def save_winner(candidate, df, features, target, promote=False):
+    model = make_model(candidate)
+    model.fit(df[features], df[target])  # Fitted on a DataFrame so the model keeps its feature names
+    if hasattr(model, 'coef_'):
+        artifact = model_artifact.artifact_from_model(model, features, cluster_index.load_index())
+        return model_artifact.save_artifact(artifact, model_artifact.ARTIFACT_PATH if promote else BEST_ARTIFACT_PATH)
+    if promote:
+        raise ValueError(f"{candidate['name']} is not linear; the dashboards serve it only with CLIMATE_MODEL_PATH={BEST_MODEL_PATH}")
+    import joblib
+    joblib.dump(model, BEST_MODEL_PATH)
+    return BEST_MODEL_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=FINAL_DATA_PATH, help='Clustered CSV to train on')
+    parser.add_argument('--folds', type=int, default=5, help='Time-series cross-validation folds')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--families', nargs='+', default=None, help='Only sweep these model families')
+    parser.add_argument('--no-save', action='store_true', help='Write the leaderboard only')
+    parser.add_argument('--promote', action='store_true', help="Replace the dashboards' model with the winner (linear winners only)")
+    args = parser.parse_args()
+
+    features, target = feature_registry.MODEL_FEATURES, feature_registry.TARGET
+    df = data_cache.cached_load(args.data, parse_training_data)
+    directory = write_fold_data(df, features, target)
+    candidates = [c for c in CANDIDATES if args.families is None or c['family'] in args.families]
+
+    leaderboard = run_sweep(directory, len(df), candidates, args.folds, args.workers)
+    leaderboard.to_csv(LEADERBOARD_PATH, index=False)
+    print(leaderboard.to_string(index=False))
+    print(f'Leaderboard saved to {LEADERBOARD_PATH}')
+
+    if not args.no_save:
+        winner = next(c for c in candidates if c['name'] == leaderboard.loc[0, 'name'])
+        try:
+            path = save_winner(winner, df, features, target, args.promote)
+        except ValueError as exc:
+            parser.exit(1, f'Not promoted: {exc}\n')
+        print(f"Best model {winner['name']} saved to {path}")
+        if path == BEST_MODEL_PATH:
+            print(f'Serve it with CLIMATE_MODEL_PATH={BEST_MODEL_PATH}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Headless rendering of the pipeline's scatter plots to PNG/SVG files.
+
+Figures are drawn with the object-oriented Matplotlib API on an Agg canvas,
+so no window is opened and nothing blocks an unattended run. Render tasks
+are plain dictionaries of arrays and settings, which lets render_all draw
+many figures in parallel worker processes.
+
+Large point counts are reduced before drawing: above MAX_SCATTER_POINTS the
+points are randomly downsampled, and above DENSITY_THRESHOLD they are
+binned into a 2D histogram per cluster and composited into one image
+(datashader-style categorical shading), so millions of points render in
+seconds.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgb
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+CLUSTER_COLORS = {0: 'blue', 1: 'green', 2: 'red'}  # Same colors as the interactive cluster plots
+MAX_SCATTER_POINTS = 50000  # Above this, points are downsampled
+DENSITY_THRESHOLD = 500000  # Above this, points are binned instead of drawn
+DENSITY_BINS = 400
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+# Function to turn a plot title into a file name
+def slugify(title):
+    return re.sub(r'[^a-z0-9]+', '_', title.lower()).strip('_')
+
+
+# Function to describe a scatter plot to render; clusters/labels are optional
+def scatter_task(path, x, y, clusters=None, labels=None, title='', xlabel='', ylabel='', month_labels=False,
+                 reference_line=None, mode='auto', figsize=(12, 6)):
+    return {
+        'path': path,
+        'x': np.asarray(x, dtype=np.float32),
+        'y': np.asarray(y, dtype=np.float32),
+        'clusters': None if clusters is None else np.asarray(clusters, dtype=np.int16),
+        'labels': labels or {},  # Cluster id -> legend label
+        'title': title,
+        'xlabel': xlabel,
+        'ylabel': ylabel,
+        'month_labels': month_labels,
+        'reference_line': reference_line,  # (low, high) for a dashed y = x line
+        'mode': mode,  # 'auto', 'scatter', 'sample' or 'density'
+        'figsize': figsize
+    }
+
+
+def _color(cluster):
+    return CLUSTER_COLORS.get(cluster, f'C{cluster % 10}')
+
+
+# Function to pick how to draw n points in 'auto' mode
+def choose_mode(n_points, mode='auto'):
+    if mode != 'auto':
+        return mode
+    if n_points <= MAX_SCATTER_POINTS:
+        return 'scatter'
+    return 'sample' if n_points <= DENSITY_THRESHOLD else 'density'
+
+
+# Function to draw a random subset of at most max_points indices, keeping the original order
+def sample_indices(n_points, max_points=MAX_SCATTER_POINTS, seed=0):
+    if n_points <= max_points:
+        return np.arange(n_points)
+    return np.sort(np.random.default_rng(seed).choice(n_points, max_points, replace=False))
+
+
+# Function to composite per-cluster 2D histograms into one RGBA image
+def density_image(x, y, clusters, bins=DENSITY_BINS):
+    extent = (float(x.min()), float(x.max()), float(y.min()), float(y.max()))
+    value_range = [[extent[2], extent[3]], [extent[0], extent[1]]]
+    rgb = np.zeros((bins, bins, 3))
+    total = np.zeros((bins, bins))
+    for cluster in np.unique(clusters):
+        mask = clusters == cluster
+        counts, _, _ = np.histogram2d(y[mask], x[mask], bins=bins, range=value_range)
+        weight = np.log1p(counts)  # Log scaling keeps sparse regions visible next to dense ones
+        rgb += weight[..., None] * np.array(to_rgb(_color(int(cluster))))
+        total += weight
+    filled = total > 0
+    rgb[filled] /= total[filled, None]  # Mix cluster colors by their share of each bin
+    alpha = np.where(filled, 0.3 + 0.7 * total / max(total.max(), 1e-12), 0.0)
+    return np.dstack([rgb, alpha]), extent
+
+
+# Function to render one scatter task to its file and return the path
+def render(task):
+    x, y = task['x'], task['y']
+    clusters = task['clusters'] if task['clusters'] is not None else np.zeros(len(x), dtype=np.int16)
+    mode = choose_mode(len(x), task['mode'])
+
+    figure = Figure(figsize=task['figsize'])
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    if mode == 'density':
+        image, extent = density_image(x, y, clusters)
+        ax.imshow(image, origin='lower', extent=extent, aspect='auto', interpolation='nearest')
+        handles = [Line2D([], [], marker='s', linestyle='', color=_color(int(c)), label=task['labels'].get(int(c), str(c)))
+                   for c in np.unique(clusters)]
+        if task['labels']:
+            ax.legend(handles=handles)
+    else:
+        if mode == 'sample':
+            keep = sample_indices(len(x))
+            x, y, clusters = x[keep], y[keep], clusters[keep]
+        for cluster in np.unique(clusters):
+            mask = clusters == cluster
+            if task['clusters'] is None:  # Single series, styled like the measured vs predicted plot
+                ax.scatter(x[mask], y[mask], color='blue', edgecolor='k', alpha=0.7)
+            else:
+                ax.scatter(x[mask], y[mask], c=_color(int(cluster)), label=task['labels'].get(int(cluster)), alpha=0.6)
+        if task['labels']:
+            ax.legend()
+    if task['reference_line'] is not None:
+        low, high = task['reference_line']
+        ax.plot([low, high], [low, high], 'k--', lw=3)
+    ax.set_title(task['title'] + (' (sampled)' if mode == 'sample' else ' (density)' if mode == 'density' else ''))
+    ax.set_xlabel(task['xlabel'])
+    ax.set_ylabel(task['ylabel'])
+    if task['month_labels']:
+        ax.set_xticks(range(1, 13))
+        ax.set_xticklabels(MONTH_NAMES)
+
+    directory = os.path.dirname(task['path'])
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    figure.savefig(task['path'])
+    return task['path']
+
+
+# Function to render several tasks in parallel worker processes
+def render_all(tasks, workers=None):
+    if workers == 1 or len(tasks) <= 1:
+        return [render(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render, tasks))
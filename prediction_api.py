@@ -0,0 +1,162 @@
+"""
+Asynchronous JSON API for the temperature model, served next to the dashboards.
+
+    GET  /api/features        feature order of the model, the target and the stations with their own model
+    POST /api/predict         one feature row -> {"prediction": 12.3}
+    POST /api/predict/batch   many feature rows -> one prediction per row, in order
+
+A feature row is an object keyed by feature name ({"Month": 7, "Wind Speed (m/s)": 2.0, ...})
+or a list of values in the feature order Linear Regression.py trains on
+(feature_registry.MODEL_FEATURES, as listed by /api/features). Add
+?station=3379 to score with a station's model from the model registry.
+
+Single rows from concurrent requests are grouped into one batch by the
+dashboard's MicroBatcher. A batch request is a JSON array of rows, or an
+NDJSON stream of rows (Content-Type: application/x-ndjson, one row per
+line). Rows are scored in vectorized chunks of BATCH_ROWS and the
+predictions are streamed back as they are computed: as a JSON array, or as
+one {"prediction": ...} line per row for NDJSON requests and requests with
+Accept: application/x-ndjson. An NDJSON batch is parsed while it arrives,
+so neither the rows nor the predictions are held in memory as a whole; a
+line that is not a valid row ends the stream with an {"error": ...} line.
+Predictions of rows with missing (null) values are null.
+
+asgi.py mounts the API at /api next to the dashboard.
+"""
+import asyncio
+import json
+import math
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import feature_registry
+import instrumentation
+import prediction_service
+
+BATCH_ROWS = 4096  # Rows scored in one vectorized call
+NDJSON = 'application/x-ndjson'
+
+
+# Function to turn feature rows (objects keyed by feature name, or lists in feature order) into an (N, n_features) array
+def feature_matrix(rows, features):
+    if not rows:
+        return np.empty((0, len(features)))
+    try:
+        X = np.array([[row[name] for name in features] if isinstance(row, dict) else row for row in rows], dtype=np.float64)
+    except KeyError as exc:
+        raise ValueError(f'Missing feature {exc.args[0]!r}') from None
+    except (TypeError, ValueError):  # Strings, nested or ragged lists
+        raise ValueError('Feature rows must be objects keyed by feature name or lists of numbers') from None
+    if X.ndim != 2 or X.shape[1] != len(features):
+        raise ValueError(f"Expected {len(features)} features per row: {', '.join(features)}")
+    return X
+
+
+# Function to format a prediction as JSON (null where a missing input made it NaN)
+def prediction_json(value):
+    return repr(value) if math.isfinite(value) else 'null'
+
+
+# Function to read an NDJSON request body as lists of at most batch_rows parsed rows, while it arrives
+async def ndjson_batches(stream, batch_rows=BATCH_ROWS):
+    buffer, rows = b'', []
+    async for chunk in stream:
+        *lines, buffer = (buffer + chunk).split(b'\n')
+        for line in lines:
+            if line.strip():
+                rows.append(json.loads(line))
+                if len(rows) >= batch_rows:
+                    yield rows
+                    rows = []
+    if buffer.strip():  # Last line without a newline
+        rows.append(json.loads(buffer))
+    if rows:
+        yield rows
+
+
+# Function to split an already validated feature array into batches of at most batch_rows
+async def array_batches(X, batch_rows=BATCH_ROWS):
+    for start in range(0, len(X), batch_rows):
+        yield X[start:start + batch_rows]
+
+
+# Function to turn a failed request into a JSON error: unknown stations are 404, anything else the client sent is 400
+def error_response(exc):
+    if isinstance(exc, KeyError):
+        return JSONResponse({'error': exc.args[0] if exc.args else 'Not found'}, status_code=404)
+    return JSONResponse({'error': str(exc)}, status_code=400)
+
+
+# Function to build the API app around the dashboard's model, station models and batcher
+def create_app(predictor, station_models, batcher=None):
+
+    # Model selected by the station query parameter (the dashboard's model by default)
+    def resolve_model(request):
+        model, _ = station_models.get(request.query_params.get('station', prediction_service.DEFAULT_STATION))
+        return model
+
+    # Score a batch in a worker thread, so large batches and non-linear models do not block the event loop
+    async def score(model, X):
+        with instrumentation.stage('prediction_api.batch_predict', rows=len(X), memory=False):
+            return await run_in_threadpool(model.predict, X)
+
+    async def stream_predictions(model, batches, ndjson):
+        first = True
+        if not ndjson:
+            yield '['
+        try:
+            async for rows in batches:
+                X = rows if isinstance(rows, np.ndarray) else feature_matrix(rows, model.features)
+                values = [prediction_json(value) for value in (await score(model, X)).tolist()]
+                if ndjson:
+                    yield ''.join(f'{{"prediction": {value}}}\n' for value in values)
+                elif values:
+                    yield ('' if first else ',') + ','.join(values)
+                    first = False
+        except ValueError as exc:  # An invalid NDJSON line after the response has started
+            yield json.dumps({'error': str(exc)}) + '\n'
+            return
+        if not ndjson:
+            yield ']'
+
+    async def features(request):
+        return JSONResponse({'features': list(predictor.features), 'target': feature_registry.TARGET,
+                             'stations': station_models.stations()})
+
+    async def predict(request):
+        try:
+            model = resolve_model(request)
+            row = feature_matrix([await request.json()], model.features)
+        except (KeyError, ValueError) as exc:
+            return error_response(exc)
+        if model is predictor and batcher is not None:
+            prediction = await asyncio.wrap_future(batcher.submit(row[0]))  # Batched with concurrent requests
+        else:
+            prediction = float((await score(model, row))[0])
+        return JSONResponse({'prediction': prediction if math.isfinite(prediction) else None})
+
+    async def predict_batch(request):
+        try:
+            model = resolve_model(request)
+            if request.headers.get('content-type', '').startswith(NDJSON):
+                batches, ndjson = ndjson_batches(request.stream()), True
+            else:
+                rows = json.loads(await request.body())
+                if not isinstance(rows, list):
+                    raise ValueError('Expected a JSON array of feature rows')
+                # A JSON array is read whole anyway, so it is validated before the response starts
+                batches = array_batches(feature_matrix(rows, model.features))
+                ndjson = NDJSON in request.headers.get('accept', '')
+        except (KeyError, ValueError) as exc:
+            return error_response(exc)
+        return StreamingResponse(stream_predictions(model, batches, ndjson), media_type=NDJSON if ndjson else 'application/json')
+
+    return Starlette(routes=[
+        Route('/features', features, methods=['GET']),
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict/batch', predict_batch, methods=['POST'])
+    ])
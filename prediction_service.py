@@ -0,0 +1,238 @@
+"""
+Prediction service for the average daily temperature model.
+
+The linear regression trained in Linear Regression.py is applied as a plain
+dot product over NumPy arrays, so N feature rows are scored in one call.
+Single requests coming from the dashboards can go through a MicroBatcher,
+which groups requests that arrive close together into one batch.
+
+The model is read from the compact JSON artifact when it exists (no sklearn
+needed), otherwise from the pickle. Loading never writes files: Linear
+Regression.py saves the artifact with the model, and an existing pickle is
+converted once with `python model_artifact.py` (the dashboards print that
+hint when they start from the default pickle). CLIMATE_MODEL_PATH
+overrides the path.
+Pickled non-linear models (e.g. the winner of model_sweep.py) are served
+through a ModelPredictor with the same interface.
+
+Per-station models from the model registry (see station_training.py) are
+loaded on first use by StationModels, which keeps only the most recently
+used ones in memory (CLIMATE_MAX_STATION_MODELS, 32 by default).
+"""
+import functools
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import instrumentation
+import model_artifact
+import model_registry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = model_artifact.PICKLE_PATH
+ARTIFACT_PATH = model_artifact.ARTIFACT_PATH
+FEATURES_PATH = model_artifact.FEATURES_PATH
+DEFAULT_STATION = 'default'  # Station selector value of the model loaded by load_predictor
+MAX_STATION_MODELS = int(os.environ.get('CLIMATE_MAX_STATION_MODELS', 32))
+
+
+# Linear model applied with its coefficients over batches of feature rows
+class LinearPredictor:
+    def __init__(self, coef, intercept, features):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()  # One coefficient per feature
+        self.intercept = float(intercept)
+        self.features = list(features)  # Column order expected in every feature row
+        if len(self.features) != self.coef.shape[0]:
+            raise ValueError(f'Model has {self.coef.shape[0]} coefficients but {len(self.features)} features')
+
+    # Build a predictor from a fitted sklearn linear model
+    @classmethod
+    def from_model(cls, model, features=None):
+        if features is None:
+            features = getattr(model, 'feature_names_in_', None)
+        if features is None:
+            raise ValueError('Feature order is unknown; pass it explicitly')
+        return cls(model.coef_, model.intercept_, features)
+
+    # Build a predictor from a compact model artifact
+    @classmethod
+    def from_artifact(cls, artifact):
+        return cls(artifact['coef'], artifact['intercept'], artifact['features'])
+
+    # Predict the temperature for an (N, n_features) array, or a single row
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)  # Treat a single row as a batch of one
+        if X.shape[1] != self.coef.shape[0]:
+            raise ValueError(f'Expected {self.coef.shape[0]} features per row, got {X.shape[1]}')
+        return X @ self.coef + self.intercept
+
+    # Turn a {feature name: value} mapping into a row in model order
+    def row(self, values):
+        return np.array([values[feature] for feature in self.features], dtype=np.float64)
+
+
+# Any fitted sklearn regressor (tree ensemble, MLP pipeline, ...) behind the LinearPredictor interface
+class ModelPredictor:
+    def __init__(self, model, features):
+        self.model = model
+        self.features = list(features)
+        # Models fitted on a DataFrame warn on every call with a bare array, so they get their column names back
+        self._frame = None
+        if getattr(model, 'feature_names_in_', None) is not None:
+            import pandas as pd  # Only needed for these models
+            self._frame = pd.DataFrame
+
+    # Predict the temperature for an (N, n_features) array, or a single row
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self._frame is not None:
+            X = self._frame(X, columns=self.features)
+        return self.model.predict(X)
+
+    # Turn a {feature name: value} mapping into a row in model order
+    def row(self, values):
+        return np.array([values[feature] for feature in self.features], dtype=np.float64)
+
+
+# Function to pick the model file: explicit path, CLIMATE_MODEL_PATH, the JSON artifact, then the pickle.
+# Non-linear models (model_sweep.py's sweep_best_model.pkl) are only served through the first two.
+def resolve_model_path(model_path=None):
+    if model_path:
+        return model_path
+    if os.environ.get('CLIMATE_MODEL_PATH'):
+        return os.environ['CLIMATE_MODEL_PATH']
+    return ARTIFACT_PATH if os.path.exists(ARTIFACT_PATH) else MODEL_PATH
+
+
+# Function to load the trained model and wrap it in a LinearPredictor (or a ModelPredictor if it is not linear)
+def load_predictor(model_path=None, features_path=FEATURES_PATH):
+    model_path = resolve_model_path(model_path)
+    if model_path.endswith('.json'):
+        return LinearPredictor.from_artifact(model_artifact.load_artifact(model_path))
+    import joblib  # Loaded lazily: unpickling the sklearn model is the slow path
+    model = joblib.load(model_path)
+    features = getattr(model, 'feature_names_in_', None)
+    if features is None:  # Models fitted on plain arrays carry no names; use the saved feature list
+        with open(features_path, 'rb') as f:
+            features = pickle.load(f)
+    if not hasattr(model, 'coef_'):
+        return ModelPredictor(model, features)
+    if model_path == MODEL_PATH:
+        print(f'Loaded the model from {MODEL_PATH}; run python model_artifact.py once to convert it to {ARTIFACT_PATH}, '
+              'which later starts load without sklearn', file=sys.stderr)
+    return LinearPredictor.from_model(model, features)
+
+
+# Per-station (predictor, cluster index) pairs read lazily from the model registry, with an LRU bound
+# on how many stay loaded. The default station returns the pair given as default.
+class StationModels:
+    def __init__(self, default=None, registry=model_registry.REGISTRY_DIR, max_models=MAX_STATION_MODELS):
+        self.default = default
+        self.registry = registry
+        self._load = functools.lru_cache(maxsize=max_models)(self._load_version)
+
+    # Stations with a model in the registry
+    def stations(self):
+        return model_registry.stations(self.registry)
+
+    # Predictor and cluster index of a station's latest version; a newly published version is picked up on the next call
+    def get(self, station):
+        if station is None or station == DEFAULT_STATION:
+            return self.default
+        version = model_registry.latest_version(station, self.registry)
+        if version is None:
+            raise KeyError(f'No model in the registry for station {station}')
+        return self._load(int(station), version)
+
+    def _load_version(self, station, version):
+        artifact = model_registry.load_artifact(station, version, self.registry)
+        return LinearPredictor.from_artifact(artifact), artifact['cluster_ranges']
+
+    def cache_info(self):
+        return self._load.cache_info()
+
+
+# Groups single-row requests that arrive within a short window into one batch.
+# Safe to create before a fork (gunicorn --preload): each process starts its own worker thread.
+class MicroBatcher:
+    def __init__(self, predictor, max_batch_size=256, max_wait=0.002):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size  # Upper bound on rows scored in one call
+        self.max_wait = max_wait  # Seconds to wait for more requests after the first one arrives
+        self._closed = False
+        self._start_lock = threading.Lock()
+        self._start_worker()
+
+    def _start_worker(self):
+        self._pid = os.getpid()
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, args=(self._requests,), name='prediction-batcher', daemon=True)
+        self._worker.start()
+
+    # Threads do not survive a fork, so a forked process restarts the worker on first use
+    def _ensure_worker(self):
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._start_worker()
+
+    # Queue one feature row and return a Future with its prediction
+    def submit(self, row):
+        if self._closed:
+            raise RuntimeError('MicroBatcher is closed')
+        self._ensure_worker()
+        future = Future()
+        self._requests.put((np.asarray(row, dtype=np.float64), future))
+        return future
+
+    # Queue one feature row and wait for its prediction
+    def predict_one(self, row, timeout=None):
+        return self.submit(row).result(timeout=timeout)
+
+    # Stop the worker once all queued requests are answered
+    def close(self):
+        self._closed = True
+        self._requests.put(None)
+        self._worker.join()
+
+    def _run(self, requests):
+        while True:
+            item = requests.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            # Collect more requests until the batch is full or the window closes
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    requests.put(None)  # Handle the shutdown after this batch
+                    break
+                batch.append(item)
+            self._score(batch)
+
+    def _score(self, batch):
+        rows, futures = zip(*batch)
+        try:
+            with instrumentation.stage('prediction_service.batch_predict', rows=len(rows), memory=False):
+                predictions = self.predictor.predict(np.vstack(rows))
+        except Exception as exc:  # Report the failure to every caller in the batch
+            for future in futures:
+                future.set_exception(exc)
+            return
+        for future, prediction in zip(futures, predictions):
+            future.set_result(float(prediction))
@@ -0,0 +1,118 @@
+"""
+Column-wise quality filtering of the DWD daily climate data.
+
+Instead of turning -999 into pd.NA across the whole frame (object dtype) and
+dropping every row with any gap, each measurement column is masked on its
+own float array: a value becomes NaN when it is the -999 placeholder, when
+the quality byte of its group (QN_3 for the wind columns, QN_4 for the
+others) is missing or in REJECTED_CODES, or when a code column marks it as
+unknown (precipitation form RSKF 9 masks the precipitation height). Rows
+are kept; every consumer then drops only the rows missing the columns it
+actually uses, so one bad reading does not cost the other readings of
+that day.
+
+By default values that only passed DWD's formal check (level 1) or a check
+with individually set criteria (level 2) are rejected. At station 03379
+that is the digitized 1954-1984 record (QN_4 1); remove 1 from
+REJECTED_CODES to keep it. The column cache is keyed on this module's
+source, so it is rebuilt when the codes change.
+
+Per-column missingness is reported in one vectorized pass:
+    python quality.py fulldata.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+MISSING_VALUE = -999
+
+# Quality byte of each group of raw DWD columns
+QUALITY_GROUPS = {
+    'QN_3': ['FX', 'FM'],
+    'QN_4': ['RSK', 'RSKF', 'SDK', 'SHK_TAG', 'NM', 'VPM', 'PM', 'TMK', 'UPM', 'TXK', 'TNK', 'TGK']
+}
+# Quality levels whose values are discarded. DWD levels range from 1 (formal check only) to 10 (fully
+# controlled and corrected); levels 1 and 2 have not been through the routine quality control.
+REJECTED_CODES = (1, 2)
+# Codes of a code column that mark other columns of the same day as unknown: column -> (codes, masked columns)
+UNKNOWN_CODES = {
+    'RSKF': ((9,), ['RSK'])  # Precipitation form 9: precipitation not determined, its height is unreliable
+}
+
+
+# Function to turn the -999 placeholder into NaN in every numeric column, without object conversion
+def mask_missing(df):
+    df = df.copy()
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if np.issubdtype(values.dtype, np.number) and (values == MISSING_VALUE).any():
+            df[column] = np.where(values == MISSING_VALUE, np.nan, values)
+    return df
+
+
+# Function to mask values that are missing, fail their group's quality code or are marked unknown; rows are never dropped
+def mask_invalid(df, rejected_codes=REJECTED_CODES, unknown_codes=UNKNOWN_CODES):
+    df = mask_missing(df)
+    for quality, columns in QUALITY_GROUPS.items():
+        if quality not in df.columns:
+            continue
+        codes = df[quality].to_numpy(dtype=np.float64)
+        rejected = np.isnan(codes) | np.isin(codes, rejected_codes)
+        if not rejected.any():
+            continue
+        for column in columns:
+            if column in df.columns:
+                df[column] = np.where(rejected, np.nan, df[column].to_numpy(dtype=np.float64))
+    for code_column, (codes, columns) in unknown_codes.items():
+        if code_column not in df.columns:
+            continue
+        unknown = np.isin(df[code_column].to_numpy(dtype=np.float64), codes)
+        if not unknown.any():
+            continue
+        for column in columns:
+            if column in df.columns:
+                df[column] = np.where(unknown, np.nan, df[column].to_numpy(dtype=np.float64))
+    return df
+
+
+# Function to compute per-column missingness (count, fraction, first and last valid date) in one pass
+def missingness(df, date_column='Date'):
+    columns = [c for c in df.columns if c != date_column and pd.api.types.is_numeric_dtype(df[c])]
+    valid = df[columns].notna().to_numpy()
+    dates = df[date_column].to_numpy()
+    any_valid = valid.any(axis=0)
+    first = np.where(any_valid, dates[valid.argmax(axis=0)], np.datetime64('NaT'))
+    last = np.where(any_valid, dates[len(dates) - 1 - valid[::-1].argmax(axis=0)], np.datetime64('NaT'))
+    missing = len(df) - valid.sum(axis=0)
+    return pd.DataFrame({
+        'missing': missing,
+        'missing_fraction': missing / max(len(df), 1),
+        'first_valid': first,
+        'last_valid': last
+    }, index=pd.Index(columns, name='column'))
+
+
+# Function to count the rows usable for a set of columns (all of them valid)
+def usable_rows(df, columns):
+    return int(df[columns].notna().all(axis=1).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', nargs='?', default='fulldata.csv', help='Raw DWD daily CSV')
+    parser.add_argument('--reject', type=int, nargs='*', default=list(REJECTED_CODES), help='Quality levels to discard')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.file)
+    df.columns = df.columns.str.strip()
+    df = mask_invalid(df, tuple(args.reject))
+    df['Date'] = pd.to_datetime(df['MESS_DATUM'], format='%Y%m%d')
+    measurements = [c for columns in QUALITY_GROUPS.values() for c in columns if c in df.columns]
+    print(missingness(df[['Date'] + measurements]).to_string())
+    print(f'{len(df)} rows; {usable_rows(df, measurements)} complete; dropna on every column would keep '
+          f'{usable_rows(df, [c for c in df.columns if c != "eor"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Compact column schema of the DWD daily climate data.
+
+Every parameter of the daily product (see Metadaten_Parameter_klima_tag_03379)
+maps to its readable column name and the smallest dtype that holds it:
+float32 measurements, int8 quality levels, precipitation forms, months and
+cluster ids, and categoricals for the cluster labels. The constant 'eor'
+column is dropped, and so are the per-row '<variable> Min'/'<variable> Max'
+columns older clustering runs wrote: the per-cluster ranges are a small side
+table, the cluster index (cluster_index.json, see range_table).
+
+Integer columns keep their dtype only when they have no gaps; a column with
+missing values (e.g. the cluster ids of rows a clustering skipped) is stored
+as float32 with NaN.
+
+The footprint of a CSV before and after the conversion is reported with:
+    python schema.py final_data_with_clusters.csv
+"""
+import argparse
+
+import pandas as pd
+
+import cluster_index
+
+# DWD parameter codes: readable column name and compact dtype
+PARAMETERS = {
+    'STATIONS_ID': {'column': 'STATIONS_ID', 'dtype': 'int32'},
+    'MESS_DATUM': {'column': 'Date', 'dtype': 'datetime64[ns]'},
+    'QN_3': {'column': 'QN_3', 'dtype': 'int8'},  # Quality level of the wind columns (1-10)
+    'FX': {'column': 'FX', 'dtype': 'float32'},
+    'FM': {'column': 'Wind Speed (m/s)', 'dtype': 'float32'},
+    'QN_4': {'column': 'QN_4', 'dtype': 'int8'},  # Quality level of the other columns (1-10)
+    'RSK': {'column': 'Precipitation Level (mm)', 'dtype': 'float32'},
+    'RSKF': {'column': 'RSKF', 'dtype': 'int8'},  # Precipitation form code (0-9)
+    'SDK': {'column': 'Sun Duration (hours)', 'dtype': 'float32'},
+    'SHK_TAG': {'column': 'Snow Height (cm)', 'dtype': 'float32'},
+    'NM': {'column': 'Cloud Cover (octaves)', 'dtype': 'float32'},
+    'VPM': {'column': 'Vapor Pressure (hPa)', 'dtype': 'float32'},
+    'PM': {'column': 'Atmospheric Pressure (hPa)', 'dtype': 'float32'},
+    'TMK': {'column': 'Average Temperature (°C)', 'dtype': 'float32'},
+    'UPM': {'column': 'Relative Humidity (%)', 'dtype': 'float32'},
+    'TXK': {'column': 'Maximum Temperature (°C)', 'dtype': 'float32'},
+    'TNK': {'column': 'Minimum Temperature (°C)', 'dtype': 'float32'},
+    'TGK': {'column': 'Soil Minimum Temperature (°C)', 'dtype': 'float32'}
+}
+COLUMN_NAMES = {code: parameter['column'] for code, parameter in PARAMETERS.items()}
+
+# Dtypes by column name, for the DWD parameters and the columns derived from them
+DTYPES = {parameter['column']: parameter['dtype'] for parameter in PARAMETERS.values()}
+DTYPES['Month'] = 'int8'
+MEASUREMENT_DTYPE = 'float32'  # Any other numeric column
+CLUSTER_DTYPE = 'int8'  # Cluster* id columns
+LABEL_DTYPE = 'category'  # Cluster Label* columns
+
+DROPPED_COLUMNS = ['eor']  # End-of-record marker, the same on every row
+RANGE_SUFFIXES = (' Min', ' Max')  # Per-row cluster range columns of older clustering runs
+
+
+# Function to tell whether a raw column is kept (usable as read_csv's usecols)
+def keep_column(name):
+    name = name.strip()
+    return name not in DROPPED_COLUMNS and not name.endswith(RANGE_SUFFIXES)
+
+
+# Function to get the compact dtype of a column from its name
+def column_dtype(name):
+    if name in DTYPES:
+        return DTYPES[name]
+    if name.startswith('Cluster Label'):
+        return LABEL_DTYPE
+    if name.startswith('Cluster'):
+        return CLUSTER_DTYPE
+    return MEASUREMENT_DTYPE
+
+
+# Function to convert one column to its compact dtype
+def convert_column(name, values):
+    dtype = column_dtype(name)
+    if pd.api.types.is_datetime64_any_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    if dtype.startswith('datetime'):
+        if pd.api.types.is_integer_dtype(values):  # Raw MESS_DATUM (yyyymmdd)
+            return pd.to_datetime(values.astype(str), format='%Y%m%d')
+        return pd.to_datetime(values)
+    if dtype == LABEL_DTYPE:
+        return values.astype(LABEL_DTYPE)
+    numeric = values
+    if not pd.api.types.is_numeric_dtype(values):
+        numeric = pd.to_numeric(values, errors='coerce')
+        if numeric.isna().sum() > values.isna().sum():  # Genuine text column: store as a categorical
+            return values.astype(LABEL_DTYPE)
+    if numeric.dtype == 'int8':  # Already compact (e.g. one-hot cluster indicators)
+        return numeric
+    if pd.api.types.is_integer_dtype(dtype) and not numeric.isna().any():
+        return numeric.astype(dtype)
+    return numeric.astype(MEASUREMENT_DTYPE)
+
+
+# Function to drop the redundant columns and convert every other column to its compact dtype
+def apply(df):
+    kept = [name for name in df.columns if keep_column(name)]
+    return pd.DataFrame({name: convert_column(name, df[name]) for name in kept}, index=df.index)
+
+
+# Function to build the per-cluster range side table from the cluster index
+def range_table(index=None):
+    index = cluster_index.load_index() if index is None else index
+    rows = [dict(variable=variable, **{key: cluster[key] for key in ('cluster', 'label', 'min', 'max')})
+            for variable, entry in index.items() for cluster in entry['clusters']]
+    return pd.DataFrame(rows, columns=['variable', 'cluster', 'label', 'min', 'max'])
+
+
+# Function to measure the memory of a DataFrame in bytes, including the strings of object columns
+def memory_usage(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# Function to compare the per-column memory of a frame before and after the conversion
+def memory_report(raw, compact):
+    before = raw.memory_usage(index=False, deep=True)
+    after = compact.memory_usage(index=False, deep=True).reindex(before.index)
+    report = pd.DataFrame({
+        'dtype': raw.dtypes.astype(str),
+        'bytes': before,
+        'compact_dtype': compact.dtypes.reindex(before.index).astype(str).where(after.notna(), 'dropped'),
+        'compact_bytes': after.fillna(0).astype('int64')
+    })
+    report.loc['total'] = ['', before.sum(), '', int(after.sum())]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', nargs='?', default='final_data_with_clusters.csv', help='CSV to report on')
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.file)
+    raw.columns = raw.columns.str.strip()
+    raw = raw.rename(columns=COLUMN_NAMES)
+    compact = apply(raw)
+    print(memory_report(raw, compact).to_string())
+    print(f'{len(raw)} rows: {memory_usage(raw) / 2 ** 20:.1f} MiB -> {memory_usage(compact) / 2 ** 20:.1f} MiB; '
+          f'cluster range side table {memory_usage(range_table())} bytes')
+
+
+if __name__ == '__main__':
+    main()
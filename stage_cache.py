@@ -0,0 +1,202 @@
+"""
+Content-addressed cache of pipeline stage outputs.
+
+A Pipeline is a small DAG of named stages. The key of a stage is a hash of
+  - the source of its function, of the same-module helpers it calls and of
+    the project modules they use (see data_cache.source_fingerprint),
+  - its parameters, plus any extra values its output depends on (module
+    constants, library versions),
+  - the SHA-1 of its input files, and
+  - the keys of the stages it takes as inputs,
+so it changes exactly when something the output depends on changes. Keys
+are computed without running anything: a stage whose key is in the cache
+is loaded instead of run, and its inputs are not computed at all unless
+another stage needs them. Editing only the plotting code of a script thus
+reuses the fitted models without reading the CSV again.
+
+Outputs are pickled to .cache/stages/<key>.pkl. Loading an output refreshes
+its modification time, and storing one evicts the least recently used
+outputs until the cache fits in CLIMATE_STAGE_CACHE_BYTES (1 GiB by
+default; 0 turns the cache off). List or clear it with:
+    python stage_cache.py
+    python stage_cache.py --clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import data_cache
+
+STAGE_DIR = os.path.join(data_cache.CACHE_DIR, 'stages')
+MAX_BYTES = int(os.environ.get('CLIMATE_STAGE_CACHE_BYTES', 1 << 30))
+SUFFIX = '.pkl'
+
+_file_hashes = {}  # (path, size, mtime_ns) -> SHA-1, so every input file is hashed once per process and change
+
+
+# Function to hash an input file, reusing the hash while its size and modification time are unchanged
+def file_hash(path):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _file_hashes:
+        _file_hashes[key] = data_cache.file_sha1(path)
+    return _file_hashes[key]
+
+
+# Size-bounded store of pickled stage outputs, evicting the least recently used
+class StageCache:
+    def __init__(self, directory=STAGE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def contains(self, key):
+        return self.max_bytes > 0 and os.path.exists(self.path(key))
+
+    # Load an output and mark it as recently used; raises KeyError when it is missing or unreadable
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(key) from None
+        except Exception:  # Truncated file or a class that no longer unpickles: drop it and recompute
+            os.remove(path)
+            raise KeyError(key) from None
+        os.utime(path)
+        return value
+
+    # Store an output (written to a temporary file and renamed, so readers never see a partial one)
+    def store(self, key, value):
+        if self.max_bytes <= 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    # List the stored outputs as (key, bytes, last use), least recently used first
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                stat = entry.stat()
+                entries.append((entry.name[:-len(SUFFIX)], stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    # Delete the least recently used outputs until the cache fits in max_bytes; returns the deleted keys
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:  # Evicted by another process meanwhile
+                pass
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            os.remove(self.path(key))
+
+
+# DAG of named stages whose outputs are cached by the hash of everything they depend on
+class Pipeline:
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else StageCache()
+        self.stages = {}
+        self.values = {}  # Outputs produced or loaded in this run
+        self.status = {}  # Stage name -> 'cached' or 'computed'
+        self._keys = {}
+
+    # Add a stage computing func(*outputs of inputs, **params). Files are hashed into the key; extra values are
+    # hashed but not passed. Stages with store=False are keyed (so stages depending on them are) but never stored.
+    def add(self, name, func, inputs=(), params=None, files=(), extra=None, store=True):
+        if name in self.stages:
+            raise ValueError(f'Stage {name} is already defined')
+        missing = [stage for stage in inputs if stage not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on undefined stages: {', '.join(missing)}")
+        self.stages[name] = {'func': func, 'inputs': list(inputs), 'params': dict(params or {}), 'files': list(files),
+                             'extra': extra, 'store': store}
+        return name
+
+    # Key of a stage, from its code, parameters, input files and the keys of its inputs
+    def key(self, name):
+        if name not in self._keys:
+            stage = self.stages[name]
+            payload = {
+                'source': data_cache.source_fingerprint(stage['func']),
+                'params': stage['params'],
+                'extra': stage['extra'],
+                'files': [file_hash(path) for path in stage['files']],
+                'inputs': [self.key(stage_input) for stage_input in stage['inputs']]
+            }
+            encoded = json.dumps(payload, sort_keys=True, default=repr).encode('utf-8')
+            self._keys[name] = hashlib.sha256(encoded).hexdigest()
+        return self._keys[name]
+
+    # Whether a stage's output can be loaded from the cache
+    def cached(self, name):
+        return self.stages[name]['store'] and self.cache.contains(self.key(name))
+
+    # Record an output computed outside run (e.g. in a process pool), storing it like run would
+    def put(self, name, value):
+        if self.stages[name]['store']:
+            self.cache.store(self.key(name), value)
+        self.values[name] = value
+        self.status[name] = 'computed'
+        return value
+
+    # Produce a stage's output: from this run, from the cache, or by running it (and the inputs it needs)
+    def run(self, name):
+        if name in self.values:
+            return self.values[name]
+        stage = self.stages[name]
+        if stage['store'] and self.cache.contains(self.key(name)):
+            try:
+                self.values[name] = self.cache.load(self.key(name))
+                self.status[name] = 'cached'
+                return self.values[name]
+            except KeyError:  # Evicted or unreadable since the check: recompute
+                pass
+        args = [self.run(stage_input) for stage_input in stage['inputs']]
+        return self.put(name, stage['func'](*args, **stage['params']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directory', default=STAGE_DIR, help='Stage cache directory')
+    parser.add_argument('--clear', action='store_true', help='Delete every cached output')
+    args = parser.parse_args()
+
+    cache = StageCache(args.directory)
+    if args.clear:
+        cache.clear()
+        print(f'Cleared {args.directory}')
+        return
+    entries = cache.entries()
+    for key, size, used in reversed(entries):
+        print(f"{key[:16]}  {size / 2 ** 20:9.1f} MiB  last used {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(used))}")
+    print(f'{len(entries)} outputs, {sum(size for _, size, _ in entries) / 2 ** 20:.1f} MiB of {MAX_BYTES / 2 ** 20:.0f} MiB '
+          f'in {args.directory}')
+
+
+if __name__ == '__main__':
+    main()
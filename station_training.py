@@ -0,0 +1,111 @@
+"""
+Parallel per-station training into the model registry.
+
+Every station of the partitioned store (see ingest.py) is trained in its
+own worker process: its rows are cleaned like fulldata.csv, the clustering
+specs of generate_plots.py are fitted on them, and the linear temperature
+model is fitted on the rows Linear Regression.py uses. The model is solved
+from sufficient statistics (see streaming_regression.py), which gives the
+coefficients LinearRegression finds on the same rows without the sklearn
+fit. The parent process publishes each station's artifact (with its
+cluster index) and KMeans models as a new version in the model registry,
+where the dashboards' station selector finds them.
+
+Run after ingesting the product files into the store:
+    python station_training.py                                 # every station in station_store
+    python station_training.py --stations 3379 1048 --workers 4
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+import cluster_index
+import feature_registry
+import generate_plots as clustering
+import ingest
+import model_artifact
+import model_registry
+import streaming_regression
+
+MIN_ROWS = 365  # Stations, and clusterings within a station, with fewer usable rows are skipped
+
+# Per-process state of the training workers, set once by _init_worker
+_thread_limits = None
+
+
+# Function to prepare a training worker: one BLAS/OpenMP thread, the pool provides the parallelism
+def _init_worker():
+    global _thread_limits
+    _thread_limits = threadpool_limits(limits=1)
+
+
+# Function to read and clean all rows of one station from the store
+def load_station(station, store=ingest.STORE_DIR):
+    parts = list(ingest.read_store(store, [station]))
+    if not parts:
+        return None
+    return clustering.clean_data(ingest.to_fulldata_layout(pd.concat(parts, ignore_index=True)))
+
+
+# Function to train the clusterings and the regression of one station (runs in a worker process).
+# Returns (station, artifact, fitted clusterings, metadata); the artifact is None when the station is skipped.
+def train_station(station, store=ingest.STORE_DIR, min_rows=MIN_ROWS):
+    start = time.perf_counter()
+    df = load_station(station, store)
+    features, target = feature_registry.MODEL_FEATURES, feature_registry.TARGET
+    training = streaming_regression.training_rows(df) if df is not None else None
+    if training is None or len(training) < min_rows:
+        return station, None, None, {'rows': 0 if training is None else len(training)}
+
+    # Clusterings whose variables have too few rows at this station are left out; the dashboards fall back
+    # to the feature registry's thresholds for them
+    specs = [spec for spec in clustering.CLUSTERING_SPECS if len(df[spec['variables']].dropna()) >= min_rows]
+    fitted_models = [clustering.run_clustering_job(df, spec)[1] for spec in specs]
+
+    stats = streaming_regression.accumulate([training], features, target)
+    coef, intercept = stats.solve()
+    mse, r2 = stats.scores(coef)
+    artifact = model_artifact.artifact_from_coefficients(coef, intercept, features, cluster_ranges=cluster_index.build_index(fitted_models))
+    metadata = {'rows': int(stats.n), 'mse': float(mse), 'r2': float(r2), 'clusterings': len(fitted_models),
+                'seconds': round(time.perf_counter() - start, 3)}
+    return station, artifact, fitted_models, metadata
+
+
+# Function to train stations in parallel and publish every trained model; returns {station: version or None}
+def train_stations(stations, store=ingest.STORE_DIR, workers=None, registry=model_registry.REGISTRY_DIR, min_rows=MIN_ROWS):
+    versions = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(train_station, station, store, min_rows) for station in stations]
+        for future in as_completed(futures):
+            station, artifact, fitted_models, metadata = future.result()
+            if artifact is None:
+                versions[station] = None
+                print(f"Station {model_registry.station_key(station)}: skipped, {metadata['rows']} usable rows")
+                continue
+            # Published from this process only, so registry updates never race
+            versions[station] = model_registry.publish(station, artifact, fitted_models, metadata, registry)
+            print(f"Station {model_registry.station_key(station)}: v{versions[station]}, {metadata['rows']} rows, "
+                  f"MSE {metadata['mse']:.3f}, R² {metadata['r2']:.3f} ({metadata['seconds']:.1f} s)")
+    return versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', default=ingest.STORE_DIR, help='Partitioned station store')
+    parser.add_argument('--stations', type=int, nargs='+', default=None, help='Stations to train (default: all in the store)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--registry', default=model_registry.REGISTRY_DIR, help='Model registry directory')
+    parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help='Skip stations with fewer usable rows')
+    args = parser.parse_args()
+
+    stations = args.stations or ingest.list_stations(args.store)
+    versions = train_stations(stations, args.store, args.workers, args.registry, args.min_rows)
+    trained = sum(version is not None for version in versions.values())
+    print(f'Published {trained} of {len(stations)} stations to {args.registry}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Out-of-core clustering mode for multi-station, multi-decade data.
+
+Instead of fitting full-batch KMeans on one in-memory DataFrame, every
+clustering spec of the clustering script gets a MiniBatchKMeans fitted with
+partial_fit over chunks read from disk (the partitioned station store or
+the columnar cache of fulldata.csv). The models are seeded with the best of
+INIT_RUNS k-means++ runs on a uniform sample of INIT_ROWS rows, and after
+the mini-batch epochs REFINE_PASSES exact Lloyd passes over the data move
+every center to the mean of its rows, which can only lower the inertia. A
+further streaming pass computes the per-cluster ranges used for labelling,
+and an optional last pass writes the clustered rows. Memory use is bounded
+by the chunk and sample sizes, not by the size of the dataset.
+
+The models and their cluster index are saved to STREAMING_MODELS_PATH and
+STREAMING_INDEX_PATH, next to the ones of the clustering script, so a
+streaming run does not change what the dashboards and incremental.py use.
+--promote saves them to kmeans_models.pkl and cluster_index.json instead:
+    python streaming_clustering.py --store station_store --promote
+
+On the existing fulldata.csv the streaming models stay within
+INERTIA_TOLERANCE of full KMeans inertia; check it with:
+    python streaming_clustering.py --check
+"""
+import argparse
+import functools
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score
+
+import cluster_index
+import data_cache
+import generate_plots as clustering
+import incremental
+import ingest
+
+CHUNK_ROWS = 100000  # Rows read from disk at a time
+BATCH_SIZE = 4096  # Rows per partial_fit call
+EPOCHS = 3  # Mini-batch passes over the data while fitting
+INIT_ROWS = 100000  # Rows of the uniform sample the centers are seeded from
+INIT_RUNS = 10  # k-means++ runs on the sample; the one with the lowest inertia seeds the model
+REFINE_PASSES = 2  # Exact Lloyd passes over the data after the mini-batch epochs
+STREAMING_MODELS_PATH = 'kmeans_models_streaming.pkl'  # Fitted models of a run that is not promoted
+STREAMING_INDEX_PATH = os.path.join(cluster_index.BASE_DIR, 'cluster_index_streaming.json')  # Their cluster index
+INERTIA_TOLERANCE = 0.02  # Mini-batch inertia may exceed full KMeans inertia by at most 2%
+
+
+# Function to stream cleaned rows from the partitioned station store, one partition at a time
+def iter_store_frames(store=ingest.STORE_DIR, stations=None):
+    for part in ingest.read_store(store, stations):
+        cleaned = clustering.clean_data(ingest.to_fulldata_layout(part))
+        if not cleaned.empty:
+            yield cleaned
+
+
+# Function to stream cleaned rows from the columnar cache of a raw CSV in fixed-size slices
+def iter_cached_frames(file_path, chunk_rows=CHUNK_ROWS):
+    clustering.load_data(file_path)  # Make sure the cache exists and is fresh
+    columns, index = data_cache.load_columns(data_cache.cache_path(file_path, clustering.parse_data))
+    for start in range(0, len(index), chunk_rows):
+        stop = start + chunk_rows
+        yield pd.DataFrame({name: values[start:stop] for name, values in columns.items()}, index=index[start:stop])
+
+
+# Function to draw a uniform sample of at most rows complete rows per spec in one streaming pass
+# (every row gets a random key and the rows with the smallest keys are kept)
+def sample_rows(frames, specs, rows=INIT_ROWS, random_state=clustering.RANDOM_STATE):
+    rng = np.random.default_rng(random_state)
+    samples = [None] * len(specs)
+    for frame in frames():
+        for i, spec in enumerate(specs):
+            data = frame[spec['variables']].dropna()
+            data = data.assign(_key=rng.random(len(data)))
+            if samples[i] is not None:
+                data = pd.concat([samples[i], data])
+            samples[i] = data.nsmallest(rows, '_key')
+    return [sample.drop(columns='_key') if sample is not None else None for sample in samples]
+
+
+# Function to seed the centers of one spec with the best of init_runs k-means++ runs on its sample
+def init_centers(sample, spec, n_clusters=3, init_runs=INIT_RUNS):
+    if sample is None or len(sample) < n_clusters:
+        raise ValueError(f"{', '.join(spec['variables'])}: need at least {n_clusters} complete rows to fit {n_clusters} clusters")
+    seed = KMeans(n_clusters=n_clusters, init='k-means++', n_init=init_runs,
+                  random_state=spec.get('random_state', clustering.RANDOM_STATE)).fit(sample)
+    return seed.cluster_centers_
+
+
+# Function to fit one MiniBatchKMeans per spec with partial_fit, reading the data once per epoch
+def fit_streaming(frames, specs=clustering.CLUSTERING_SPECS, n_clusters=3, batch_size=BATCH_SIZE, epochs=EPOCHS,
+                  init_rows=INIT_ROWS):
+    samples = sample_rows(frames, specs, init_rows)
+    models = [MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, init=init_centers(sample, spec, n_clusters), n_init=1,
+                              random_state=spec.get('random_state', clustering.RANDOM_STATE)) for spec, sample in zip(specs, samples)]
+    pending = [None] * len(specs)  # Rows held back until there are enough for the first partial_fit call
+    for _ in range(epochs):
+        for frame in frames():
+            for i, (spec, model) in enumerate(zip(specs, models)):
+                data = frame[spec['variables']].dropna()  # Rows missing one of the spec's variables are skipped
+                if pending[i] is not None:
+                    data, pending[i] = pd.concat([pending[i], data]), None
+                for start in range(0, len(data), batch_size):
+                    batch = data.iloc[start:start + batch_size]
+                    if len(batch) < n_clusters and not hasattr(model, 'cluster_centers_'):
+                        pending[i] = batch  # The first partial_fit call needs at least n_clusters rows
+                        continue
+                    model.partial_fit(batch)
+    return models
+
+
+# Function to move every center to the mean of the rows nearest to it, in exact Lloyd passes over the data
+def refine_centers(frames, specs, models, passes=REFINE_PASSES):
+    for _ in range(passes):
+        sums = [np.zeros(model.cluster_centers_.shape) for model in models]
+        counts = [np.zeros(model.n_clusters) for model in models]
+        for frame in frames():
+            for i, (spec, model) in enumerate(zip(specs, models)):
+                data = frame[spec['variables']].dropna()
+                if data.empty:
+                    continue
+                clusters = model.predict(data)
+                np.add.at(sums[i], clusters, data.to_numpy(dtype=np.float64))
+                counts[i] += np.bincount(clusters, minlength=model.n_clusters)
+        for model, total, count in zip(models, sums, counts):
+            assigned = count > 0  # A center no row is nearest to stays where it is
+            model.cluster_centers_[assigned] = total[assigned] / count[assigned, None]
+    return models
+
+
+# Function to compute per-cluster min/max of each spec's ranking variable in a second streaming pass
+def streaming_cluster_ranges(frames, specs, models):
+    n_clusters = [model.n_clusters for model in models]
+    mins = [np.full(k, np.inf) for k in n_clusters]
+    maxs = [np.full(k, -np.inf) for k in n_clusters]
+    for frame in frames():
+        for i, (spec, model) in enumerate(zip(specs, models)):
+            data = frame[spec['variables']].dropna()
+            if data.empty:
+                continue
+            clusters = model.predict(data)
+            values = data[spec['variable']].to_numpy(dtype=np.float64)
+            np.minimum.at(mins[i], clusters, values)
+            np.maximum.at(maxs[i], clusters, values)
+    return [{c: {'min': mins[i][c], 'max': maxs[i][c]} for c in range(k)} for i, k in enumerate(n_clusters)]
+
+
+# Function to fit every spec out of core and return fitted clusterings usable for label assignment
+def cluster_streaming(frames, specs=clustering.CLUSTERING_SPECS, n_clusters=3, batch_size=BATCH_SIZE, epochs=EPOCHS):
+    models = refine_centers(frames, specs, fit_streaming(frames, specs, n_clusters, batch_size, epochs))
+    ranges = streaming_cluster_ranges(frames, specs, models)
+    fitted_models = []
+    for spec, model, cluster_ranges in zip(specs, models, ranges):
+        cluster_labels = clustering.label_clusters(cluster_ranges, spec['labels'])
+        fitted_models.append(clustering.fitted_clustering(model, spec['variable'], cluster_ranges, cluster_labels, spec['suffix']))
+    return fitted_models
+
+
+# Function to write clustered rows chunk by chunk (the label assignment pass)
+def write_clustered(frames, fitted_models, output_path):
+    rows = 0
+    for frame in frames():
+        clustered = incremental.assign_clusters(frame, fitted_models)
+        clustered.to_csv(output_path, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+        rows += len(clustered)
+    return rows
+
+
+# Function to compare mini-batch and full KMeans on an in-memory dataset
+def compare_with_full_kmeans(file_path='fulldata.csv', specs=clustering.CLUSTERING_SPECS, n_clusters=3, chunk_rows=CHUNK_ROWS):
+    df = clustering.load_data(file_path)
+    fitted_models = cluster_streaming(functools.partial(iter_cached_frames, file_path, chunk_rows), specs, n_clusters)
+    report = []
+    for spec, fitted in zip(specs, fitted_models):
+        X = df[spec['variables']].dropna()
+        full = KMeans(n_clusters=n_clusters, random_state=spec.get('random_state', clustering.RANDOM_STATE),
+                      n_init=clustering.N_INIT).fit(X)
+        streaming_inertia = -fitted['kmeans'].score(X)  # score() is the negative inertia on X
+        report.append({
+            'variables': spec['variables'],
+            'full_inertia': full.inertia_,
+            'streaming_inertia': streaming_inertia,
+            'relative_gap': streaming_inertia / full.inertia_ - 1,
+            'adjusted_rand': adjusted_rand_score(full.labels_, fitted['kmeans'].predict(X))
+        })
+    return report
+
+
+# Main function to cluster the partitioned store out of core, or to check quality against full KMeans
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', default=ingest.STORE_DIR, help='Partitioned station store to cluster')
+    parser.add_argument('--output', default='final_data_with_clusters_streaming.csv', help='Clustered rows written by the label pass')
+    parser.add_argument('--models', default=STREAMING_MODELS_PATH, help='Where to save the fitted models')
+    parser.add_argument('--index', default=STREAMING_INDEX_PATH, help='Where to save their cluster index')
+    parser.add_argument('--promote', action='store_true',
+                        help=f'Replace the production models and index ({clustering.MODELS_PATH}, cluster_index.json) instead')
+    parser.add_argument('--epochs', type=int, default=EPOCHS, help='Passes over the data while fitting')
+    parser.add_argument('--check', action='store_true', help='Compare against full KMeans on fulldata.csv instead')
+    args = parser.parse_args()
+
+    if args.check:
+        failed = False
+        for row in compare_with_full_kmeans():
+            failed |= row['relative_gap'] > INERTIA_TOLERANCE
+            print(f"{', '.join(row['variables'])}: inertia gap {row['relative_gap']:+.2%}, adjusted Rand {row['adjusted_rand']:.3f}")
+        print(f'Tolerance: {INERTIA_TOLERANCE:.0%} -> {"FAILED" if failed else "OK"}')
+        sys.exit(1 if failed else 0)
+
+    if args.promote:
+        args.models, args.index = clustering.MODELS_PATH, cluster_index.INDEX_PATH
+
+    frames = functools.partial(iter_store_frames, args.store)  # Each pass re-reads the store from disk
+    fitted_models = cluster_streaming(frames, epochs=args.epochs)
+    joblib.dump(fitted_models, args.models)
+    cluster_index.save_index(cluster_index.build_index(fitted_models), args.index)
+    rows = write_clustered(frames, fitted_models, args.output)
+    print(f'Clustered {rows} rows into {args.output}; models saved to {args.models}, cluster index to {args.index}')
+
+
+if __name__ == '__main__':
+    main()
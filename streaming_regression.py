@@ -0,0 +1,228 @@
+"""
+Streaming trainer for the linear temperature model.
+
+Instead of materializing X and y and refitting LinearRegression from
+scratch, the trainer accumulates sufficient statistics chunk by chunk: the
+row count, the feature and target means and the centered cross-products
+XᵀX and Xᵀy. Solving the normal equations on those gives the same
+coefficients as LinearRegression (alpha=0) or Ridge (alpha>0), both with a
+fitted intercept.
+
+Statistics merge exactly, so partitions (one station-year file of the
+station store each) are reduced in parallel and combined. The statistics
+are saved, and retraining on new days only reads the new rows:
+    python streaming_regression.py                          # full pass over final_data_with_clusters.csv
+    python streaming_regression.py --store station_store    # parallel pass over the station store
+    python streaming_regression.py --update new_days.csv    # add rows to the saved statistics
+    python streaming_regression.py --check                  # compare with sklearn
+
+The model is saved to STREAMING_ARTIFACT_PATH, so training does not change
+the dashboards' model; --promote saves it to linear_regression_model.json
+instead.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import cluster_index
+import feature_registry
+import generate_plots as clustering
+import ingest
+import model_artifact
+import quality
+import schema
+
+FINAL_DATA_PATH = 'final_data_with_clusters.csv'
+STATS_PATH = 'regression_stats.npz'
+CHUNK_ROWS = 100000
+STREAMING_ARTIFACT_PATH = os.path.join(model_artifact.BASE_DIR, 'linear_regression_model_streaming.json')  # Model of a run that is not promoted
+
+
+# Count, means and centered cross-products of a stream of (X, y) rows
+class SufficientStats:
+    def __init__(self, features):
+        self.features = list(features)
+        self.n = 0
+        self.mean_x = np.zeros(len(self.features))
+        self.mean_y = 0.0
+        self.sxx = np.zeros((len(self.features), len(self.features)))  # Σ (x - mean_x)(x - mean_x)ᵀ
+        self.sxy = np.zeros(len(self.features))  # Σ (x - mean_x)(y - mean_y)
+        self.syy = 0.0  # Σ (y - mean_y)²
+
+    # Build the statistics of one batch of rows
+    @classmethod
+    def from_batch(cls, features, X, y):
+        stats = cls(features)
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) == 0:
+            return stats
+        if not (np.isfinite(X).all() and np.isfinite(y).all()):  # One NaN row would turn every sum and coefficient into NaN
+            raise ValueError('Rows with missing features or target; drop them before accumulating (see training_rows)')
+        stats.n = len(y)
+        stats.mean_x = X.mean(axis=0)
+        stats.mean_y = float(y.mean())
+        Xc = X - stats.mean_x
+        yc = y - stats.mean_y
+        stats.sxx = Xc.T @ Xc
+        stats.sxy = Xc.T @ yc
+        stats.syy = float(yc @ yc)
+        return stats
+
+    # Combine another set of statistics into this one (pairwise update, exact up to rounding)
+    def merge(self, other):
+        if other.features != self.features:
+            raise ValueError('Cannot merge statistics over different features')
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+        self.sxx = self.sxx + other.sxx + weight * np.outer(dx, dx)
+        self.sxy = self.sxy + other.sxy + weight * dx * dy
+        self.syy = self.syy + other.syy + weight * dy * dy
+        self.mean_x = self.mean_x + dx * other.n / n
+        self.mean_y = self.mean_y + dy * other.n / n
+        self.n = n
+        return self
+
+    # Add a batch of rows
+    def update(self, X, y):
+        return self.merge(SufficientStats.from_batch(self.features, X, y))
+
+    # Solve for (coef, intercept); alpha > 0 adds a ridge penalty on the coefficients
+    def solve(self, alpha=0.0):
+        if self.n == 0:
+            raise ValueError('No rows accumulated')
+        if alpha > 0:
+            coef = np.linalg.solve(self.sxx + alpha * np.eye(len(self.features)), self.sxy)
+        else:
+            coef = np.linalg.lstsq(self.sxx, self.sxy, rcond=None)[0]  # Tolerates collinear features like LinearRegression
+        return coef, self.mean_y - self.mean_x @ coef
+
+    # Training mean squared error and R² of given coefficients, computed from the statistics alone
+    def scores(self, coef):
+        sse = self.syy - 2 * coef @ self.sxy + coef @ self.sxx @ coef
+        return sse / self.n, 1 - sse / self.syy
+
+    def save(self, path=STATS_PATH):
+        np.savez(path, features=np.array(self.features), n=self.n, mean_x=self.mean_x, mean_y=self.mean_y,
+                 sxx=self.sxx, sxy=self.sxy, syy=self.syy)
+
+    @classmethod
+    def load(cls, path=STATS_PATH):
+        with np.load(path) as saved:
+            stats = cls(saved['features'].tolist())
+            stats.n = int(saved['n'])
+            stats.mean_x, stats.mean_y = saved['mean_x'], float(saved['mean_y'])
+            stats.sxx, stats.sxy, stats.syy = saved['sxx'], saved['sxy'], float(saved['syy'])
+        return stats
+
+
+# Function to keep the rows with every model input and the target (clean_data keeps incomplete rows)
+def training_rows(df):
+    return df.dropna(subset=feature_registry.MEASUREMENT_FEATURES + [feature_registry.TARGET])
+
+
+# Function to clean a chunk of the clustered CSV like Linear Regression.py does
+def clean_chunk(df):
+    df.columns = df.columns.str.strip()
+    df = training_rows(quality.mask_missing(df))
+    df['Month'] = pd.to_datetime(df['Date']).dt.month
+    return df
+
+
+# Function to read the clustered CSV chunk by chunk as cleaned frames
+def iter_training_chunks(file_path=FINAL_DATA_PATH, chunk_rows=CHUNK_ROWS):
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows, usecols=schema.keep_column):
+        yield clean_chunk(chunk)
+
+
+# Function to accumulate statistics over cleaned frames
+def accumulate(frames, features=feature_registry.MODEL_FEATURES, target=feature_registry.TARGET, stats=None):
+    stats = stats if stats is not None else SufficientStats(features)
+    for frame in frames:
+        stats.update(frame[features].to_numpy(dtype=np.float64), frame[target].to_numpy(dtype=np.float64))
+    return stats
+
+
+# Function to compute the statistics of one station-year file of the store (runs in a worker process)
+def partition_stats(path):
+    frame = clustering.clean_data(ingest.to_fulldata_layout(pd.read_csv(path)))  # Same cleaning as fulldata.csv
+    return accumulate([training_rows(frame)])
+
+
+# Function to compute the statistics of every store partition in parallel and merge them
+def store_stats(store=ingest.STORE_DIR, workers=None):
+    stats = SufficientStats(feature_registry.MODEL_FEATURES)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partition in pool.map(partition_stats, ingest.partition_files(store)):
+            stats.merge(partition)
+    return stats
+
+
+# Function to solve the statistics and save them as a compact model artifact (the dashboards' one when promoted)
+def save_model(stats, alpha=0.0, artifact_path=STREAMING_ARTIFACT_PATH):
+    coef, intercept = stats.solve(alpha)
+    artifact = model_artifact.artifact_from_coefficients(coef, intercept, stats.features, 'Ridge' if alpha > 0 else 'LinearRegression',
+                                                         cluster_index.load_index())
+    model_artifact.save_artifact(artifact, artifact_path)
+    return coef, intercept
+
+
+# Function to compare the streaming solution with sklearn on the same rows
+def check_against_sklearn(file_path=FINAL_DATA_PATH, alpha=0.0, chunk_rows=CHUNK_ROWS):
+    from sklearn.linear_model import LinearRegression, Ridge
+
+    frames = list(iter_training_chunks(file_path, chunk_rows))
+    coef, intercept = accumulate(frames).solve(alpha)
+    data = pd.concat(frames)
+    model = Ridge(alpha=alpha) if alpha > 0 else LinearRegression()
+    model.fit(data[feature_registry.MODEL_FEATURES].to_numpy(dtype=np.float64), data[feature_registry.TARGET].to_numpy(dtype=np.float64))
+    np.testing.assert_allclose(coef, model.coef_, rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(intercept, model.intercept_, rtol=1e-6, atol=1e-9)
+    return np.max(np.abs(coef - model.coef_)), abs(intercept - model.intercept_)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=FINAL_DATA_PATH, help='Clustered CSV to train on')
+    parser.add_argument('--store', default=None, help='Train on the station store instead, one worker per partition')
+    parser.add_argument('--update', nargs='+', default=None, help='CSV files of new rows to add to the saved statistics')
+    parser.add_argument('--stats', default=STATS_PATH, help='Saved sufficient statistics')
+    parser.add_argument('--alpha', type=float, default=0.0, help='Ridge penalty (0 for ordinary least squares)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --store')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per chunk')
+    parser.add_argument('--check', action='store_true', help='Compare the coefficients with sklearn and exit')
+    parser.add_argument('--promote', action='store_true', help="Replace the dashboards' model artifact with the trained model")
+    args = parser.parse_args()
+
+    if args.check:
+        coef_gap, intercept_gap = check_against_sklearn(args.data, args.alpha, args.chunk_rows)
+        print(f'Matches sklearn: max coefficient difference {coef_gap:.3e}, intercept difference {intercept_gap:.3e}')
+        return
+
+    if args.update:
+        stats = SufficientStats.load(args.stats)
+        for path in args.update:
+            accumulate(iter_training_chunks(path, args.chunk_rows), stats=stats)
+    elif args.store:
+        stats = store_stats(args.store, args.workers)
+    else:
+        stats = accumulate(iter_training_chunks(args.data, args.chunk_rows))
+    stats.save(args.stats)
+
+    artifact_path = model_artifact.ARTIFACT_PATH if args.promote else STREAMING_ARTIFACT_PATH
+    coef, intercept = save_model(stats, args.alpha, artifact_path)
+    mse, r2 = stats.scores(coef)
+    print(f'Trained on {stats.n} rows; statistics saved to {args.stats}, model to {artifact_path}')
+    print(f'Training Mean Squared Error: {mse}')
+    print(f'Training R² Score: {r2}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+Production entry point for the dashboards.
+
+Serve with a multi-worker WSGI server instead of the development server:
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+CLIMATE_DASHBOARD selects the app: 'Cluster' (month dropdown, default) or
+'Dash' (month slider). The model is loaded when this module is imported, so
+with preload_app (see gunicorn.conf.py) it is loaded once in the master and
+shared copy-on-write by the forked workers.
+"""
+import importlib
+import os
+
+DASHBOARD = os.environ.get('CLIMATE_DASHBOARD', 'Cluster')
+
+app = importlib.import_module(DASHBOARD).app
+server = app.server